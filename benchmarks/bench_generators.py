@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of the generators over a grid of parameters, with JSON baselines and regression checks.
+
+Run ``python -m benchmarks.bench_generators --output baseline.json`` to save a baseline and
+``python -m benchmarks.bench_generators --compare baseline.json`` to flag regressions against it. Every case
+is run once to warm up, then repeated for at least ``--min-time`` seconds, and its median speed is reported.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from datetime import datetime
+from datetime import timezone
+from itertools import product
+from random import seed
+from statistics import median
+from time import perf_counter
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from cnf_generator import random_cnf
+from cnf_generator.cnf import CNF
+from cnf_generator.exceptions import CNFGenException
+from cnf_generator.iso_gen import cnf_isomorphic_generator
+from cnf_generator.non_iso_gen import cnf_generator_trivial_add_clause
+from cnf_generator.non_iso_gen import cnf_generator_trivial_add_literal_occurrence
+from cnf_generator.non_iso_gen import cnf_generator_trivial_add_new_symbol
+from cnf_generator.non_iso_gen_paper import non_trivial_non_isomorphic_cnf_generator
+
+GRID = {
+    'num_symbols': (10, 50),
+    'num_clauses': (20, 100),
+    'width': (3, 6),
+    'monotone': (False, True),
+}
+QUICK_GRID = {
+    'num_symbols': (20,),
+    'num_clauses': (30,),
+    'width': (3,),
+    'monotone': (False, True),
+}
+MIN_REPEATS = 3
+DEFAULT_MIN_TIME = 0.2
+
+TRANSFORMATIONS: Dict[str, Callable[[CNF], CNF]] = {
+    'cnf_isomorphic_generator': cnf_isomorphic_generator,
+    'cnf_generator_trivial_add_clause': cnf_generator_trivial_add_clause,
+    'cnf_generator_trivial_add_literal_occurrence': cnf_generator_trivial_add_literal_occurrence,
+    'cnf_generator_trivial_add_new_symbol': cnf_generator_trivial_add_new_symbol,
+    'non_trivial_non_isomorphic_cnf_generator': non_trivial_non_isomorphic_cnf_generator,
+}
+
+
+def _cnf_params(num_symbols: int, num_clauses: int, width: int, monotone: bool) -> Dict:
+    """Return the parameters of random_cnf for a point of the grid."""
+    return {
+        'min_num_symbols': num_symbols,
+        'max_num_symbols': num_symbols,
+        'min_num_clauses': num_clauses,
+        'max_num_clauses': num_clauses,
+        'avg_literals_per_clause': width,
+        'monotone': monotone,
+    }
+
+
+def _call_all(func: Callable[[int], object], how_many: int) -> int:
+    """Call func for every index with the same seed, returning the number of failures."""
+    seed(0)
+    failures = 0
+    for idx in range(how_many):
+        try:
+            func(idx)
+        except CNFGenException:
+            failures += 1
+    return failures
+
+
+def _measure(func: Callable[[int], object], how_many: int, min_time: float) -> Dict[str, float]:
+    """Call func for every index, returning formulas per second, peak memory and failure rate.
+
+    After a warm-up run, the calls are repeated at least MIN_REPEATS times and for at least min_time seconds,
+    and the speed is the one of the median run. Memory is measured in another run, since tracing memory slows
+    everything down.
+    """
+    failures = _call_all(func, how_many)
+    times: List[float] = []
+    while len(times) < MIN_REPEATS or sum(times) < min_time:
+        start = perf_counter()
+        _call_all(func, how_many)
+        times.append(perf_counter() - start)
+    elapsed = median(times)
+    tracemalloc.start()
+    _call_all(func, how_many)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'formulas_per_sec': how_many / elapsed if elapsed else 0,
+        'peak_memory_kib': peak / 1024,
+        'failure_rate': failures / how_many,
+        'repeats': len(times),
+    }
+
+
+def run(grid: Dict, how_many: int, min_time: float = DEFAULT_MIN_TIME) -> Dict[str, Dict[str, float]]:
+    """Return the measures of every generator for every point of the grid."""
+    results = {}
+    for num_symbols, num_clauses, width, monotone in product(*grid.values()):
+        params = _cnf_params(num_symbols, num_clauses, width, monotone)
+        point = f'symbols={num_symbols},clauses={num_clauses},width={width},monotone={monotone}'
+
+        results[f'random_cnf[{point}]'] = _measure(lambda _: random_cnf(**params), how_many, min_time)
+
+        seed(0)
+        sources: List[CNF] = [random_cnf(**params) for _ in range(how_many)]
+        for name, transformation in TRANSFORMATIONS.items():
+            results[f'{name}[{point}]'] = _measure(
+                lambda idx: transformation(sources[idx]), how_many, min_time,  # noqa: B023
+            )
+    return results
+
+
+def incompatibility(baseline: Dict, how_many: int, grid: Dict) -> Optional[str]:
+    """Return why a saved baseline cannot be compared with a run, None if it can."""
+    if baseline.get('formulas') != how_many:
+        return f'the baseline has {baseline.get("formulas")} formulas for every case, not {how_many}'
+    if baseline.get('grid') != _grid_as_json(grid):
+        return f'the baseline has the grid {baseline.get("grid")}, not {_grid_as_json(grid)}'
+    return None
+
+
+def _grid_as_json(grid: Dict) -> Dict[str, List]:
+    """Return the grid as saved in a JSON baseline."""
+    return {name: list(values) for name, values in grid.items()}  # noqa: WPS110
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return the description of the regressions of the results against the baseline."""
+    regressions = []
+    for case, measures in sorted(results.items()):
+        base = baseline.get(case)
+        if base is None:
+            continue
+        if measures['formulas_per_sec'] < base['formulas_per_sec'] * (1 - threshold):
+            regressions.append(
+                f'{case}: {measures["formulas_per_sec"]:.1f} formulas/s, baseline {base["formulas_per_sec"]:.1f}',
+            )
+        if measures['peak_memory_kib'] > base['peak_memory_kib'] * (1 + threshold):
+            regressions.append(
+                f'{case}: {measures["peak_memory_kib"]:.1f} KiB peak, baseline {base["peak_memory_kib"]:.1f}',
+            )
+        if measures['failure_rate'] > base['failure_rate'] + threshold:
+            regressions.append(
+                f'{case}: {measures["failure_rate"]:.2f} failure rate, baseline {base["failure_rate"]:.2f}',
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    """Run the benchmark, saving and comparing results as requested, returning the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--formulas', type=int, default=50, help='formulas generated for every case')
+    parser.add_argument('--quick', action='store_true', help='use a small grid of parameters')
+    parser.add_argument(
+        '--min-time', type=float, default=DEFAULT_MIN_TIME, help='seconds every case is repeated for, at least',
+    )
+    parser.add_argument('--output', help='save the results as a JSON baseline in this file')
+    parser.add_argument('--compare', help='compare the results with the JSON baseline in this file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change flagged as regression')
+    args = parser.parse_args(argv)
+
+    grid = QUICK_GRID if args.quick else GRID
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        reason = incompatibility(baseline, args.formulas, grid)
+        if reason is not None:
+            parser.error(f'cannot compare with {args.compare}: {reason}')
+
+    results = run(grid, args.formulas, args.min_time)
+    case_width = max(len(case) for case in results)
+    for case, measures in results.items():
+        print(
+            f'{case:<{case_width}} {measures["formulas_per_sec"]:>10.1f} formulas/s '
+            + f'{measures["peak_memory_kib"]:>10.1f} KiB {measures["failure_rate"]:>6.2f} failures',
+        )
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'created': datetime.now(timezone.utc).isoformat(),
+                'formulas': args.formulas,
+                'grid': _grid_as_json(grid),
+                'min_time': args.min_time,
+                'results': results,
+            }, output_file, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline['results'], args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of the startup cost of the package in fresh interpreters, like short-lived workers.
+
+Run ``python -m benchmarks.bench_import`` to print the median time of every case, ``--output`` saves the
+results as JSON and ``--compare`` flags regressions against a saved baseline.
+"""
+
+import argparse
+import json
+import platform
+import subprocess  # noqa: S404
+import sys
+from datetime import datetime
+from datetime import timezone
+from statistics import median
+from typing import Dict
+from typing import List
+
+CASES = {
+    'import cnf_generator': 'import cnf_generator',
+    'first random_cnf': 'from cnf_generator import random_cnf; random_cnf()',
+    'first random_pairs': 'from cnf_generator import random_pairs; list(random_pairs(1))',
+}
+
+# the measured statement runs in a new interpreter, which prints its time and the modules it loaded
+CHILD_TEMPLATE = '''
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'numpy': 'numpy' in sys.modules, 'modules': len(sys.modules)}}))
+'''
+
+
+def _run_child(statement: str) -> Dict:
+    """Run the statement in a fresh interpreter, returning its measures."""
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', CHILD_TEMPLATE.format(statement=statement)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(repeat: int) -> Dict[str, Dict]:
+    """Return median time, loaded modules and whether NumPy was imported for every case."""
+    results = {}
+    for case, statement in CASES.items():
+        runs = [_run_child(statement) for _ in range(repeat)]
+        results[case] = {
+            'median_ms': median(child['seconds'] for child in runs) * 1000,
+            'modules': runs[-1]['modules'],
+            'numpy_imported': runs[-1]['numpy'],
+        }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return the description of the regressions of the results against the baseline."""
+    regressions = []
+    for case, measures in sorted(results.items()):
+        base = baseline.get(case)
+        if base is not None and measures['median_ms'] > base['median_ms'] * (1 + threshold):
+            regressions.append(f'{case}: {measures["median_ms"]:.1f} ms, baseline {base["median_ms"]:.1f}')
+    return regressions
+
+
+def main(argv=None) -> int:
+    """Run the benchmark, saving and comparing results as requested, returning the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='fresh interpreters started for every case')
+    parser.add_argument('--output', help='save the results as a JSON baseline in this file')
+    parser.add_argument('--compare', help='compare the results with the JSON baseline in this file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change flagged as regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    case_width = max(len(case) for case in results)
+    for case, measures in results.items():
+        print(
+            f'{case:<{case_width}} {measures["median_ms"]:>8.1f} ms {measures["modules"]:>5} modules '
+            + f'numpy {"imported" if measures["numpy_imported"] else "not imported"}',
+        )
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'created': datetime.now(timezone.utc).isoformat(),
+                'repeat': args.repeat,
+                'results': results,
+            }, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,58 @@
 # -*- coding: utf-8 -*-
 
-"""Generators for cnf and (non) isomorphic functions."""
-
-from .cnf import CNF
-from .cnf import Clause
-from .cnf import Literal
-from .random_generators import random_cnf
-from .random_generators import random_cnfs
-from .random_generators import random_pairs
+"""Generators for cnf and (non) isomorphic functions.
+
+The names of the package are imported from their modules the first time they are used, so that importing
+the package does not load NumPy or generators that are never called.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+from typing import List
+
+_LAZY_NAMES = {
+    'isomorphic_variants': 'batch_generators',
+    'random_cnfs_batch': 'batch_generators',
+    'random_packed_cnfs': 'batch_generators',
+    'CNF': 'cnf',
+    'Clause': 'cnf',
+    'Literal': 'cnf',
+    'PackedCNF': 'packed',
+    'random_cnf': 'random_generators',
+    'random_cnfs': 'random_generators',
+    'random_pairs': 'random_generators',
+}
+
+__all__ = list(_LAZY_NAMES)
+
+if TYPE_CHECKING:
+    from .batch_generators import isomorphic_variants  # noqa: F401
+    from .batch_generators import random_cnfs_batch  # noqa: F401
+    from .batch_generators import random_packed_cnfs  # noqa: F401
+    from .cnf import CNF  # noqa: F401
+    from .cnf import Clause  # noqa: F401
+    from .cnf import Literal  # noqa: F401
+    from .packed import PackedCNF  # noqa: F401
+    from .random_generators import random_cnf  # noqa: F401
+    from .random_generators import random_cnfs  # noqa: F401
+    from .random_generators import random_pairs  # noqa: F401
+
+
+def __getattr__(name: str):
+    """Import a name of the package from its module, or a submodule, the first time it is used."""
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        try:
+            return import_module(f'.{name}', __name__)
+        except ModuleNotFoundError as error:
+            if error.name != f'{__name__}.{name}':
+                raise
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    attribute = getattr(import_module(f'.{module_name}', __name__), name)
+    globals()[name] = attribute
+    return attribute
+
+
+def __dir__() -> List[str]:
+    """Return the names of the package, including the ones not imported yet."""
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""Vectorized NumPy sampling shared by the batch and the streaming generators."""
+
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+from .exceptions import GenerationFailedException
+from .stats import count
+
+PADDING_CODE = np.iinfo(np.int64).max
+MAX_REJECTION_ROUNDS = 8
+DENSE_SYMBOLS_FACTOR = 4
+
+
+def sample_distinct_codes(rng: np.random.Generator, spaces: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    """Return, for every row, ``widths[row]`` distinct codes in ``range(spaces[row])`` sorted and padded."""
+    rows = widths.size
+    max_width = int(widths.max(initial=0))
+    columns = np.arange(max_width)
+    padding = columns >= widths[:, None]
+    codes = np.empty((rows, max_width), dtype=np.int64)
+
+    todo = np.arange(rows)
+    for _ in range(MAX_REJECTION_ROUNDS):
+        if not todo.size:
+            return codes
+        count('random_packed_cnfs.clause_draws', todo.size)
+        drawn = (rng.random((todo.size, max_width)) * spaces[todo, None]).astype(np.int64)
+        drawn[padding[todo]] = PADDING_CODE
+        drawn.sort(axis=1)
+        repeated = (drawn[:, 1:] == drawn[:, :-1]) & (drawn[:, 1:] != PADDING_CODE)
+        accepted = ~repeated.any(axis=1)
+        codes[todo[accepted]] = drawn[accepted]
+        todo = todo[~accepted]
+
+    # rows still rejected have a width close to their space: pick the smallest random keys instead
+    if todo.size:
+        keys = rng.random((todo.size, int(spaces[todo].max())))
+        keys[np.arange(keys.shape[1]) >= spaces[todo, None]] = np.inf
+        drawn = np.argsort(keys, axis=1)[:, :max_width].astype(np.int64)
+        drawn[padding[todo]] = PADDING_CODE
+        drawn.sort(axis=1)
+        codes[todo] = drawn
+    return codes
+
+
+def sample_symbols_indexes(rng: np.random.Generator, num_symbols: np.ndarray, universe: int) -> List[np.ndarray]:
+    """Return, for every formula, ``num_symbols[formula]`` distinct random indexes of range(universe)."""
+    if universe <= DENSE_SYMBOLS_FACTOR * int(num_symbols.max(initial=0)):
+        symbols_order = np.argsort(rng.random((num_symbols.size, universe)), axis=1)
+        return [symbols_order[formula, :how_many] for formula, how_many in enumerate(num_symbols.tolist())]
+    # with a large universe, sampling every formula on its own takes time proportional to its symbols
+    return [rng.choice(universe, size=how_many, replace=False) for how_many in num_symbols.tolist()]
+
+
+def splitmix64(values: np.ndarray) -> np.ndarray:
+    """Return the splitmix64 hashes of arrays of non negative integers."""
+    mixed = (values.astype(np.uint64) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+    mixed ^= mixed >> np.uint64(30)
+    mixed *= np.uint64(0xBF58476D1CE4E5B9)
+    mixed ^= mixed >> np.uint64(27)
+    mixed *= np.uint64(0x94D049BB133111EB)
+    mixed ^= mixed >> np.uint64(31)
+    return mixed
+
+
+class DistinctRanks:
+    """Draw distinct random ranks of range(total) a few at a time, without listing all of them in advance.
+
+    Ranks are drawn with rejection against a mask of the used ones (a byte per rank) while at least half of the
+    ranks are unused, then the unused ones are shuffled once and taken in order.
+    """
+
+    def __init__(self, total: int):
+        """Start with all the ranks unused."""
+        self.total = total
+        self.available = total
+        self._used = np.zeros(total, dtype=bool)
+        self._shuffled: Optional[np.ndarray] = None
+
+    def take(self, rng: np.random.Generator, how_many: int) -> np.ndarray:
+        """Return how_many ranks never returned before, in a random order."""
+        if how_many > self.available:
+            raise GenerationFailedException(f'Only {self.available} ranks left, {how_many} requested.')
+        self.available -= how_many
+        drawn = []
+        while how_many and self._shuffled is None and 2 * (self.available + how_many) >= self.total:
+            candidates = rng.integers(self.total, size=how_many)
+            _, first_occurrences = np.unique(candidates, return_index=True)
+            candidates = candidates[np.sort(first_occurrences)]
+            new_ranks = candidates[~self._used[candidates]]
+            count('distinct_ranks.rejections', how_many - new_ranks.size)
+            self._used[new_ranks] = True
+            drawn.append(new_ranks)
+            how_many -= new_ranks.size
+        if how_many:
+            if self._shuffled is None:
+                self._shuffled = rng.permutation(np.flatnonzero(~self._used))
+                self._used = np.empty(0, dtype=bool)  # the mask is no longer needed
+            drawn.append(self._shuffled[:how_many])
+            self._shuffled = self._shuffled[how_many:]
+        return np.concatenate(drawn) if drawn else np.empty(0, dtype=np.int64)
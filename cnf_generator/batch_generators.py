@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""Vectorized generators producing many random cnfs at once."""
+
+from math import comb
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Union
+
+import numpy as np
+
+from .array_sampling import MAX_REJECTION_ROUNDS
+from .array_sampling import PADDING_CODE
+from .array_sampling import sample_distinct_codes
+from .array_sampling import sample_symbols_indexes
+from .array_sampling import splitmix64
+from .cnf import CNF
+from .cnf import STD_SYMBOLS
+from .exceptions import GenerationFailedException
+from .packed import LITERAL_DTYPE
+from .packed import PackedCNF
+from .stats import count
+from .stats import instrumented
+
+@instrumented
+def random_packed_cnfs(  # noqa: WPS211
+    how_many_cnf: int,
+    *,
+    symbols: Optional[Sequence[str]] = None,
+    min_num_symbols: int = 25,
+    max_num_symbols: int = 50,
+    min_num_clauses: int = 20,
+    max_num_clauses: int = 30,
+    avg_literals_per_clause: int = 6,
+    all_clauses_same_dimension: bool = True,
+    monotone: bool = False,
+    random_seed: Optional[int] = None,
+    **kwargs,
+) -> List[PackedCNF]:
+    """Generate many random packed cnfs at once, with the same distribution of ``random_cnf``."""
+    symbols = symbols or sorted(STD_SYMBOLS)
+    rng = np.random.default_rng(random_seed)
+
+    num_symbols = rng.integers(min_num_symbols, max_num_symbols, endpoint=True, size=how_many_cnf)
+    num_symbols = np.minimum(num_symbols, len(symbols))
+    symbols_indexes = sample_symbols_indexes(rng, num_symbols, len(symbols))
+    num_clauses = rng.integers(min_num_clauses, max_num_clauses, endpoint=True, size=how_many_cnf)
+
+    # a literal code is the local symbol index, doubled with the negation in the lowest bit if not monotone
+    literals_space = num_symbols if monotone else num_symbols * 2
+
+    allowed_widths = [avg_literals_per_clause]
+    if not all_clauses_same_dimension:
+        allowed_widths = list(range(1, avg_literals_per_clause * 2))
+    capacities = {
+        space: sum(comb(space, width) for width in allowed_widths)
+        for space in set(literals_space.tolist())
+    }
+    if any(clauses > capacities[space] for clauses, space in zip(num_clauses.tolist(), literals_space.tolist())):
+        raise GenerationFailedException('Not enough distinct clauses for the requested number of clauses.')
+
+    # every row is [formula, width, sorted codes...] so that equal clauses of a formula are equal rows
+    accepted = np.empty((0, max(avg_literals_per_clause * 2 - 1, 1) + 2), dtype=np.int64)
+    missing = num_clauses
+    while missing.any():
+        count('random_packed_cnfs.rounds')
+        row_formula = np.repeat(np.arange(how_many_cnf), missing)
+        if all_clauses_same_dimension:
+            widths = np.full(row_formula.size, avg_literals_per_clause, dtype=np.int64)
+        else:
+            # wider clauses than the literals are never possible
+            max_widths = np.minimum((avg_literals_per_clause * 2) - 1, literals_space[row_formula])
+            widths = rng.integers(1, max_widths, endpoint=True)
+
+        codes = sample_distinct_codes(rng, literals_space[row_formula], widths)
+        rows = np.full((row_formula.size, accepted.shape[1]), PADDING_CODE, dtype=np.int64)
+        rows[:, 0] = row_formula
+        rows[:, 1] = widths
+        rows[:, 2:2 + codes.shape[1]] = codes
+
+        accepted = np.concatenate((accepted, rows))
+        _, first_occurrences = np.unique(accepted, axis=0, return_index=True)
+        accepted = accepted[np.sort(first_occurrences)]
+        missing = num_clauses - np.bincount(accepted[:, 0], minlength=how_many_cnf)
+
+    accepted = accepted[np.argsort(accepted[:, 0], kind='stable')]
+    codes = accepted[:, 2:]
+    codes = codes[codes != PADDING_CODE]
+    if monotone:
+        literals = codes + 1
+    else:
+        literals = (codes >> 1) + 1
+        literals[(codes & 1).astype(bool)] *= -1
+    literals = literals.astype(LITERAL_DTYPE)
+
+    clause_offsets = np.concatenate(([0], np.cumsum(accepted[:, 1])))
+    formula_offsets = np.concatenate(([0], np.cumsum(num_clauses)))
+    packed_cnfs = []
+    for formula in range(how_many_cnf):
+        first_clause, last_clause = formula_offsets[formula], formula_offsets[formula + 1]
+        offsets = clause_offsets[first_clause:last_clause + 1]
+        formula_symbols = [symbols[idx] for idx in symbols_indexes[formula].tolist()]
+        packed_cnfs.append(PackedCNF(literals[offsets[0]:offsets[-1]], offsets - offsets[0], formula_symbols))
+    return packed_cnfs
+
+
+def random_cnfs_batch(how_many_cnf: int, **kwargs) -> List[CNF]:
+    """Generate many random cnfs at once, with the same distribution of ``random_cnf``."""
+    return [packed.to_cnf() for packed in random_packed_cnfs(how_many_cnf, **kwargs)]
+
+
+def _variant_keys(codes: np.ndarray, offsets: np.ndarray) -> List[bytes]:
+    """Return a key for every row of literal codes, equal for rows representing the same cnf.
+
+    Every clause is hashed as the sum of the hashes of its literals and the clause hashes are sorted, so the
+    key does not depend on the order of clauses and literals.
+    """
+    sums = np.zeros((codes.shape[0], codes.shape[1] + 1), dtype=np.uint64)
+    np.cumsum(splitmix64(codes), axis=1, out=sums[:, 1:])
+    clause_hashes = sums[:, offsets[1:]] - sums[:, offsets[:-1]]
+    clause_hashes.sort(axis=1)
+    return [row.tobytes() for row in clause_hashes]
+
+
+@instrumented
+def packed_isomorphic_variants(  # noqa: WPS210
+    original_cnf: Union[CNF, PackedCNF],
+    how_many: int,
+    *,
+    new_symbols: Optional[Sequence[str]] = None,
+    monotone: bool = False,
+    distinct: bool = False,
+    random_seed: Optional[int] = None,
+    **kwargs,
+) -> List[PackedCNF]:
+    """Return many packed cnfs isomorph to the original, like ``cnf_isomorphic_generator`` but all at once.
+
+    The original cnf is packed once, then the symbol mappings and the polarity flips of all the variants are
+    drawn as arrays: every variant shares the clause offsets of the original and gets its own signs and symbol
+    table. With distinct the variants are pairwise distinct, raising an exception if they are not enough.
+    """
+    source = original_cnf if isinstance(original_cnf, PackedCNF) else PackedCNF.from_cnf(original_cnf)
+    universe = new_symbols or kwargs.get('symbols') or sorted(STD_SYMBOLS)
+    num_symbols = source.num_symbols
+    if len(universe) < num_symbols:
+        raise GenerationFailedException(f'Only {len(universe)} symbols for {num_symbols} symbols of the cnf.')
+
+    rng = np.random.default_rng(random_seed)
+    symbols_indexes = np.abs(source.literals).astype(np.int64) - 1
+    negated = source.literals < 0
+    variants: List[PackedCNF] = []
+    seen: Set[bytes] = set()
+    for _ in range(MAX_REJECTION_ROUNDS if distinct else 1):
+        missing = how_many - len(variants)
+        if missing <= 0:
+            break
+        count('packed_isomorphic_variants.draws', missing)
+        targets = np.empty((missing, num_symbols), dtype=np.int64)
+        targets[:] = sample_symbols_indexes(rng, np.full(missing, num_symbols), len(universe))
+        flipped = np.broadcast_to(negated, (missing, negated.size))
+        if not monotone:
+            flipped = flipped ^ (rng.random((missing, num_symbols)) < 0.5)[:, symbols_indexes]
+        literals = np.where(flipped, -1, 1).astype(LITERAL_DTYPE) * (symbols_indexes + 1).astype(LITERAL_DTYPE)
+
+        keys = _variant_keys(2 * targets[:, symbols_indexes] + flipped, source.offsets) if distinct else []
+        for variant, variant_targets in enumerate(targets.tolist()):
+            if distinct:
+                if keys[variant] in seen:
+                    continue
+                seen.add(keys[variant])
+            variant_symbols = [universe[idx] for idx in variant_targets]
+            variants.append(PackedCNF(literals[variant], source.offsets, variant_symbols))
+
+    if len(variants) < how_many:
+        raise GenerationFailedException(f'Only {len(variants)} distinct isomorphic variants found.')
+    return variants
+
+
+def isomorphic_variants(original_cnf: Union[CNF, PackedCNF], how_many: int, **kwargs) -> List[CNF]:
+    """Return many cnfs isomorph to the original, like ``packed_isomorphic_variants`` but as cnfs."""
+    return [packed.to_cnf() for packed in packed_isomorphic_variants(original_cnf, how_many, **kwargs)]
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""Inverted index from literals and symbols to bitsets of the clauses of a cnf."""
+
+from collections import defaultdict
+from typing import TYPE_CHECKING
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .cnf import Clause
+    from .cnf import Literal
+
+WORD_DTYPE = np.uint64
+WORD_BITS = 64
+POPCOUNT_TABLE = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+Query = Tuple[Iterable, Iterable]
+
+
+class ClauseIndex:
+    """Answer queries on the clauses of a cnf with bitwise operations over packed bitsets.
+
+    Bit ``i`` of a bitset stands for clause ``i`` of ``clauses``. The positions of the clauses of every literal
+    are collected in a single pass over the cnf, while the bitset of a literal or a symbol is built the first
+    time it is needed and then cached.
+    """
+
+    def __init__(self, cnf):
+        """Collect the positions of the clauses of every literal."""
+        self.clauses: Tuple['Clause', ...] = tuple(cnf.clauses)
+        self.num_words = -(-len(self.clauses) // WORD_BITS)
+        positions: Dict['Literal', List[int]] = defaultdict(list)
+        for position, clause in enumerate(self.clauses):
+            for literal in clause.literals:
+                positions[literal].append(position)
+        self._positions = dict(positions)
+        self._symbol_literals: Dict[str, List['Literal']] = defaultdict(list)
+        for literal in self._positions:  # noqa: WPS440
+            self._symbol_literals[literal.symbol].append(literal)
+        self._literal_bits: Dict['Literal', np.ndarray] = {}
+        self._symbol_bits: Dict[str, np.ndarray] = {}
+
+    def empty(self) -> np.ndarray:
+        """Return a new bitset without clauses."""
+        return np.zeros(self.num_words, dtype=WORD_DTYPE)
+
+    def literal_bits(self, literal: 'Literal') -> np.ndarray:
+        """Return the bitset of the clauses containing the literal (read-only, it is cached)."""
+        bits = self._literal_bits.get(literal)
+        if bits is None:
+            bits = self.empty()
+            positions = np.array(self._positions.get(literal, ()), dtype=np.int64)
+            np.bitwise_or.at(bits, positions >> 6, np.left_shift(WORD_DTYPE(1), (positions & 63).astype(WORD_DTYPE)))
+            bits.flags.writeable = False
+            self._literal_bits[literal] = bits
+        return bits
+
+    def symbol_bits(self, symbol: str) -> np.ndarray:
+        """Return the bitset of the clauses containing the symbol, positive or negated (read-only, it is cached)."""
+        bits = self._symbol_bits.get(symbol)
+        if bits is None:
+            bits = self.empty()
+            for literal in self._symbol_literals.get(symbol, ()):
+                bits |= self.literal_bits(literal)
+            bits.flags.writeable = False
+            self._symbol_bits[symbol] = bits
+        return bits
+
+    def _union(self, bits_of: Callable[..., np.ndarray], keys: Iterable) -> np.ndarray:
+        """Return the bitset of the clauses containing at least one of the keys."""
+        union = self.empty()
+        for key in keys:
+            union |= bits_of(key)
+        return union
+
+    def _query(self, bits_of: Callable[..., np.ndarray], included: Iterable, excluded: Iterable) -> np.ndarray:
+        """Return the bitset of the clauses with some included key and no excluded key."""
+        bits = self._union(bits_of, included)
+        bits &= ~self._union(bits_of, excluded)
+        return bits
+
+    def query_literals(self, included: Iterable['Literal'], excluded: Iterable['Literal'] = ()) -> np.ndarray:
+        """Return the bitset of the clauses with some included literal and no excluded literal."""
+        return self._query(self.literal_bits, included, excluded)
+
+    def query_symbols(self, included: Iterable[str], excluded: Iterable[str] = ()) -> np.ndarray:
+        """Return the bitset of the clauses with some included symbol and no excluded symbol."""
+        return self._query(self.symbol_bits, included, excluded)
+
+    def positions(self, bits: np.ndarray) -> np.ndarray:
+        """Return the positions of the clauses in the bitset."""
+        flags = np.unpackbits(bits.view(np.uint8), bitorder='little')
+        return np.flatnonzero(flags[:len(self.clauses)])
+
+    def clauses_of(self, bits: np.ndarray) -> List['Clause']:
+        """Return the clauses in the bitset."""
+        return [self.clauses[position] for position in self.positions(bits).tolist()]
+
+    def count(self, bits: np.ndarray) -> int:
+        """Return the number of clauses in the bitset."""
+        return int(POPCOUNT_TABLE[bits.view(np.uint8)].sum())
+
+    def bulk_query(self, queries: Sequence[Query], by_symbols: bool = False) -> np.ndarray:
+        """Return the bitsets of many (included, excluded) queries as the rows of a matrix."""
+        bits_of = self.symbol_bits if by_symbols else self.literal_bits
+        matrix = np.empty((len(queries), self.num_words), dtype=WORD_DTYPE)
+        for row, (included, excluded) in enumerate(queries):
+            matrix[row] = self._query(bits_of, included, excluded)
+        return matrix
+
+    def bulk_count(self, queries: Sequence[Query], by_symbols: bool = False) -> np.ndarray:
+        """Return the number of clauses matching each of many (included, excluded) queries."""
+        matrix = self.bulk_query(queries, by_symbols)
+        return POPCOUNT_TABLE[matrix.view(np.uint8)].reshape(len(queries), -1).sum(axis=1)
+
+    def bulk_clauses(self, queries: Sequence[Query], by_symbols: bool = False) -> List[List['Clause']]:
+        """Return the clauses matching each of many (included, excluded) queries."""
+        return [self.clauses_of(bits) for bits in self.bulk_query(queries, by_symbols)]
@@ -2,116 +2,431 @@
 
 """CNF related classes."""
 
+import sys
+from collections import deque
+from dataclasses import FrozenInstanceError
 from dataclasses import dataclass
 from itertools import chain
+from operator import attrgetter
 from string import ascii_letters
 from string import digits
+from typing import TYPE_CHECKING
+from typing import AbstractSet
+from typing import Deque
+from typing import Dict
 from typing import FrozenSet
+from typing import Iterable
 from typing import Iterator
+from typing import Optional
 from typing import Set
-from typing import Union
+from typing import Tuple
+from typing import TypeVar
+from weakref import ReferenceType
+from weakref import ref
 
 from .exceptions import SymbolNotAllowed
+from .fingerprint import cnf_fingerprint
+
+if TYPE_CHECKING:
+    from .clause_index import ClauseIndex
 
 CONJUCTION_SYMBOL = '&'
 DISJUCTION_SYMBOL = '|'
 NEGATED_SYMBOL = '!'
 NOT_ALLOWED_SYMBOLS = frozenset((CONJUCTION_SYMBOL, DISJUCTION_SYMBOL, NEGATED_SYMBOL))
 STD_SYMBOLS = frozenset(ascii_letters + digits)
+HASH_MODULUS = sys.hash_info.modulus
+MIN_LITERALS_TO_PRUNE = 1024
+RECENT_LITERALS = 4096
+# the clause filters scan the clauses until a formula is large and queried often enough to pay for an index
+MIN_CLAUSES_TO_INDEX = 256
+QUERIES_TO_INDEX = 16
+_CLAUSE_HASH = attrgetter('_hash')
+
+ItemType = TypeVar('ItemType')
+
+# weak references to the interned literals, so that the literals no longer used are freed: the keys of the
+# freed ones are removed when the table has doubled since the last pruning. The most recently created
+# literals are kept alive, so that generating many small formulas does not create their literals every time.
+_INTERNED_LITERALS: Dict[Tuple[str, bool], 'ReferenceType[Literal]'] = {}
+_RECENT_LITERALS: Deque['Literal'] = deque(maxlen=RECENT_LITERALS)
+_literals_to_prune = MIN_LITERALS_TO_PRUNE
+
+
+def _frozen_setattr(self, name, value):  # noqa: WPS110
+    """Raise the same error of frozen dataclasses."""
+    raise FrozenInstanceError(f'cannot assign to field {name!r}')
+
+
+def _interned_literal(key: Tuple[str, bool]) -> Optional['Literal']:
+    """Return the interned literal of the key, None if there is no one."""
+    reference = _INTERNED_LITERALS.get(key)
+    return None if reference is None else reference()
+
 
+def _intern_literal(key: Tuple[str, bool], literal: 'Literal'):
+    """Save a weak reference to the literal, removing the keys of the freed literals if the table has doubled."""
+    global _literals_to_prune  # noqa: WPS420
+    if len(_INTERNED_LITERALS) >= _literals_to_prune:
+        for freed_key, reference in list(_INTERNED_LITERALS.items()):
+            if reference() is None:
+                _INTERNED_LITERALS.pop(freed_key, None)
+        _literals_to_prune = max(MIN_LITERALS_TO_PRUNE, 2 * len(_INTERNED_LITERALS))
+    _INTERNED_LITERALS[key] = ref(literal)
 
-@dataclass(frozen=True)
+
+# Literal, Clause and CNF are still dataclasses (fields, replace and asdict work as before), with their
+# own __init__, __repr__, __eq__ and __hash__: the private attributes are declared only for type checkers,
+# so that they are not fields.
+
+
+@dataclass(frozen=True, init=False, repr=False, eq=False)
 class Literal:
-    """Represent a literal in a cnf formula."""
+    """Represent a literal in a cnf formula.
+
+    Literals are interned: every (symbol, is_negated) pair is a single immutable object, with hash and
+    str representation computed once.
+    """
+
+    __slots__ = ('symbol', 'is_negated', '_hash', '_str', '__weakref__')
 
     symbol: str
-    is_negated: bool = False
+    is_negated: bool
+
+    if TYPE_CHECKING:
+        _hash: int
+        _str: str
+
+    def __new__(cls, symbol: str, is_negated: bool = False):
+        """Return the interned literal, raising an exception if the symbol is not allowed."""
+        key = (symbol, is_negated)
+        literal = _interned_literal(key)
+        if literal is not None:
+            return literal
+
+        if symbol.startswith(NEGATED_SYMBOL):
+            symbol = symbol.replace(NEGATED_SYMBOL, '')
+            is_negated = True
+        is_negated = bool(is_negated)
+        if (not symbol) or (symbol in NOT_ALLOWED_SYMBOLS):
+            raise SymbolNotAllowed(f'Symbol {symbol} not allowed for literal.')
 
-    def __post_init__(self):
-        """Raise an exception if the symbol is not allowed."""
-        if self.symbol.startswith(NEGATED_SYMBOL):
-            object.__setattr__(self, 'symbol', self.symbol.replace(NEGATED_SYMBOL, ''))  # noqa: WPS609
-            object.__setattr__(self, 'is_negated', True)  # noqa: WPS425,WPS609
-        if (not self.symbol) or (self.symbol in NOT_ALLOWED_SYMBOLS):
-            raise SymbolNotAllowed(f'Symbol {self.symbol} not allowed for literal.')
+        literal = _interned_literal((symbol, is_negated))
+        if literal is None:
+            literal = object.__new__(cls)
+            object.__setattr__(literal, 'symbol', symbol)  # noqa: WPS609
+            object.__setattr__(literal, 'is_negated', is_negated)  # noqa: WPS609
+            object.__setattr__(literal, '_hash', hash(symbol) ^ hash(is_negated))  # noqa: WPS609
+            object.__setattr__(literal, '_str', f'{NEGATED_SYMBOL}{symbol}' if is_negated else symbol)  # noqa: WPS609
+            _intern_literal((symbol, is_negated), literal)
+            _RECENT_LITERALS.append(literal)
+        if key != (symbol, is_negated):
+            _intern_literal(key, literal)
+        return literal
 
     def __str__(self) -> str:
         """Return the str representation of the literal."""
-        negated = ''
-        if self.is_negated:
-            negated = NEGATED_SYMBOL
-        return f'{negated}{self.symbol}'
+        return self._str
+
+    def __repr__(self) -> str:
+        """Return the representation of the literal."""
+        return f'Literal(symbol={self.symbol!r}, is_negated={self.is_negated!r})'
+
+    def __eq__(self, other) -> bool:
+        """Literals are interned, so equal literals are the same object."""
+        if self is other:
+            return True
+        if not isinstance(other, Literal):
+            return NotImplemented
+        return self.symbol == other.symbol and self.is_negated == other.is_negated
 
     def __hash__(self):
         """Hash of the attributes."""
-        return hash(self.symbol) ^ hash(self.is_negated)
+        return self._hash
+
+    def __reduce__(self):
+        """Unpickle as the interned literal."""
+        return Literal, (self.symbol, self.is_negated)
+
 
+# A slot cannot have a default in the class body, so the default of the field is set once the class is built
+Literal.__dataclass_fields__['is_negated'].default = False  # noqa: WPS609
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, init=False, repr=False, eq=False)
 class Clause:
     """Represent a clause in a cnf formula."""
 
+    __slots__ = ('literals', '_hash', '_str')
+
     literals: FrozenSet[Literal]
 
-    def __init__(self, literals: Set[Literal]):
-        """Save the frozenset."""
-        object.__setattr__(self, 'literals', frozenset(literals))  # noqa: WPS609
+    if TYPE_CHECKING:
+        _hash: int
+        _str: Optional[str]
+
+    def __init__(self, literals: Iterable[Literal]):
+        """Save the frozenset and its hash."""
+        literals = frozenset(literals)
+        object.__setattr__(self, 'literals', literals)  # noqa: WPS609
+        object.__setattr__(self, '_hash', hash(literals))  # noqa: WPS609
+        object.__setattr__(self, '_str', None)  # noqa: WPS609
 
     def __str__(self) -> str:
-        """Return the str representation of the clause."""
-        return DISJUCTION_SYMBOL.join(str(literal) for literal in self.literals)
+        """Return the str representation of the clause, computed once."""
+        text = self._str
+        if text is None:
+            text = DISJUCTION_SYMBOL.join(str(literal) for literal in self.literals)
+            object.__setattr__(self, '_str', text)  # noqa: WPS609
+        return text
+
+    def __repr__(self) -> str:
+        """Return the representation of the clause."""
+        return f'Clause(literals={self.literals!r})'
 
     @property
     def symbols(self):
         """Return all the symbols in clause."""
         yield from (literal.symbol for literal in self.literals)
 
+    def __eq__(self, other) -> bool:
+        """Compare the literals, checking the hashes first."""
+        if self is other:
+            return True
+        if not isinstance(other, Clause):
+            return NotImplemented
+        return self._hash == other._hash and self.literals == other.literals
+
     def __hash__(self):
         """Return directly the hash of the frozenset."""
-        return hash(self.literals)
+        return self._hash
+
+    def __reduce__(self):
+        """Pickle only the literals."""
+        return Clause, (self.literals,)
+
+
+def literal_sort_key(literal: Literal) -> Tuple[str, bool]:
+    """Return a key ordering literals in the same way in every interpreter, unlike their hashes."""
+    return literal.symbol, literal.is_negated
+
+
+def clause_sort_key(clause: Clause) -> Tuple[Tuple[str, bool], ...]:
+    """Return a key ordering clauses in the same way in every interpreter, unlike their hashes."""
+    return tuple(sorted(literal_sort_key(literal) for literal in clause.literals))
+
 
+def _clauses_hash(clauses: Iterable[Clause]) -> int:
+    """Return the sum of the hashes of the clauses, which can be updated clause by clause."""
+    return sum(map(_CLAUSE_HASH, clauses)) % HASH_MODULUS
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, init=False, repr=False, eq=False)
 class CNF:
-    """Represent a cnf formula."""
+    """Represent a cnf formula.
+
+    Its hash is the sum of the hashes of the clauses, computed the first time it is needed, so that the hash
+    of an edited formula is computed from the changes only (see DeltaCNF).
+    """
+
+    __slots__ = ('clauses', '_hash', '_str', '_fingerprint', '_index', '_queries')
+
+    clauses: AbstractSet[Clause]
 
-    clauses: FrozenSet[Clause]
+    if TYPE_CHECKING:
+        _hash: Optional[int]
+        _str: Optional[str]
+        _fingerprint: Optional[str]
+        _index: Optional[ClauseIndex]
+        _queries: int
 
-    def __init__(self, clauses: Union[Set[Clause], FrozenSet[Clause]]):
+    def __init__(self, clauses: Iterable[Clause]):
         """Save the frozenset."""
         object.__setattr__(self, 'clauses', frozenset(clauses))  # noqa: WPS609
+        object.__setattr__(self, '_hash', None)  # noqa: WPS609
+        object.__setattr__(self, '_str', None)  # noqa: WPS609
+        object.__setattr__(self, '_fingerprint', None)  # noqa: WPS609
+        object.__setattr__(self, '_index', None)  # noqa: WPS609
+        object.__setattr__(self, '_queries', 0)  # noqa: WPS609
 
     @property
     def literals(self):
         """Iterate through literals over all the clauses."""
         yield from chain.from_iterable(clause.literals for clause in self.clauses)
 
+    def clause_index(self) -> 'ClauseIndex':
+        """Return the bitset index of the clauses (see ClauseIndex), built once."""
+        index = self._index
+        if index is None:
+            # imported here so that numpy is imported only when an index is needed
+            from .clause_index import ClauseIndex  # noqa: WPS433
+            index = ClauseIndex(self)
+            object.__setattr__(self, '_index', index)  # noqa: WPS609
+        return index
+
+    def _query_index(self) -> Optional['ClauseIndex']:
+        """Return the index to answer a clause filter, or None to scan the clauses.
+
+        The index is built only for formulas with at least MIN_CLAUSES_TO_INDEX clauses, once they have been
+        filtered QUERIES_TO_INDEX times, since building it costs many scans.
+        """
+        if self._index is None:
+            queries = self._queries + 1
+            object.__setattr__(self, '_queries', queries)  # noqa: WPS609
+            if queries <= QUERIES_TO_INDEX or len(self.clauses) < MIN_CLAUSES_TO_INDEX:
+                return None
+        return self.clause_index()
+
     def filtered_clauses_by_literals(self, included: Set[Literal], excluded: Set[Literal]) -> Iterator[Clause]:
         """Iterate through clauses filtering by literals."""
+        index = self._query_index()
+        if index is not None:
+            yield from index.clauses_of(index.query_literals(included, excluded))
+            return
         included_set = set(included)
         excluded_set = set(excluded)
         for clause in self.clauses:
-            if not (clause.literals & included_set):
-                continue
-            if clause.literals & excluded_set:
-                continue
-            yield clause
+            if clause.literals & included_set and not clause.literals & excluded_set:
+                yield clause
 
     def filtered_clauses_by_symbols(self, included: Set[str], excluded: Set[str]) -> Iterator[Clause]:
         """Iterate through clauses filtering by symbols."""
+        index = self._query_index()
+        if index is not None:
+            yield from index.clauses_of(index.query_symbols(included, excluded))
+            return
         included_set = set(included)
         excluded_set = set(excluded)
         for clause in self.clauses:
-            if not (set(clause.symbols) & included_set):
-                continue
-            if set(clause.symbols) & excluded_set:
-                continue
-            yield clause
+            symbols = set(clause.symbols)
+            if symbols & included_set and not symbols & excluded_set:
+                yield clause
+
+    def fingerprint(self) -> str:
+        """Return a fingerprint invariant under renaming and negation of symbols, computed once."""
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            fingerprint = cnf_fingerprint(self)
+            object.__setattr__(self, '_fingerprint', fingerprint)  # noqa: WPS609
+        return fingerprint
 
     def __str__(self) -> str:
-        """Return the str representation of the formula."""
-        return CONJUCTION_SYMBOL.join(str(clause) for clause in self.clauses)
+        """Return the str representation of the formula, computed once."""
+        text = self._str
+        if text is None:
+            text = CONJUCTION_SYMBOL.join(str(clause) for clause in self.clauses)
+            object.__setattr__(self, '_str', text)  # noqa: WPS609
+        return text
+
+    def __repr__(self) -> str:
+        """Return the representation of the formula."""
+        return f'CNF(clauses={self.clauses!r})'
+
+    def __eq__(self, other) -> bool:
+        """Compare the clauses, checking the hashes first if both are already computed."""
+        if self is other:
+            return True
+        if not isinstance(other, CNF):
+            return NotImplemented
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        return self.clauses == other.clauses
 
     def __hash__(self):
-        """Return directly the hash of the frozenset."""
-        return hash(self.clauses)
+        """Return the hash computed from the clauses, computing it the first time."""
+        if self._hash is None:
+            object.__setattr__(self, '_hash', _clauses_hash(self.clauses))  # noqa: WPS609
+        return self._hash
+
+    def __reduce__(self):
+        """Pickle only the clauses."""
+        return CNF, (frozenset(self.clauses),)
+
+
+class _DeltaClauses(AbstractSet[Clause]):
+    """Read-only set of the clauses of a base cnf without the removed ones and with the added ones."""
+
+    __slots__ = ('_base', '_added', '_removed')
+
+    def __init__(self, base: AbstractSet[Clause], added: FrozenSet[Clause], removed: FrozenSet[Clause]):
+        """Save the base clauses and the changes, without copying them."""
+        self._base = base
+        self._added = added
+        self._removed = removed
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[ItemType]) -> FrozenSet[ItemType]:  # noqa: WPS111
+        """Return the results of set operations as frozensets."""
+        return frozenset(it)
+
+    def __contains__(self, clause) -> bool:
+        """Return True if the clause is in the set."""
+        return clause in self._added or (clause in self._base and clause not in self._removed)
+
+    def __iter__(self) -> Iterator[Clause]:
+        """Iterate through the clauses."""
+        yield from (clause for clause in self._base if clause not in self._removed)
+        yield from self._added
+
+    def __len__(self) -> int:
+        """Return the number of clauses."""
+        return len(self._base) - len(self._removed) + len(self._added)
+
+    def __repr__(self) -> str:
+        """Return the representation of the set of clauses."""
+        return repr(frozenset(self))
+
+
+class DeltaCNF(CNF):
+    """Represent a cnf as the clauses of a parent cnf, with some of them removed and some added.
+
+    The clauses of the parent are shared, not copied: building it takes time proportional to the changes
+    (accumulated over a chain of edits, until they are as many as the shared clauses and they are merged).
+    It can be used everywhere a cnf is, and it is equal to the cnf with the same clauses. Its hash is
+    computed from the one of the shared cnf (computed once for all the cnfs sharing it) and the changes.
+    """
+
+    __slots__ = ('base', 'added', 'removed')
+
+    base: CNF
+    added: FrozenSet[Clause]
+    removed: FrozenSet[Clause]
+
+    __setattr__ = _frozen_setattr
+
+    def __init__(self, parent: CNF, added: Iterable[Clause] = (), removed: Iterable[Clause] = ()):
+        """Save the changes to the parent, merged with the ones of the parent if it is a DeltaCNF."""
+        parent_clauses = parent.clauses
+        removed = frozenset(clause for clause in removed if clause in parent_clauses)
+        added = frozenset(clause for clause in added if clause not in parent_clauses or clause in removed)
+        restored = added & removed
+        added -= restored
+        removed -= restored
+
+        base = parent
+        if isinstance(parent, DeltaCNF):
+            base = parent.base
+            added, removed = (
+                (parent.added - removed) | (added - parent.removed),
+                (parent.removed - added) | (removed - parent.added),
+            )
+        if len(added) + len(removed) > len(base.clauses):
+            base = CNF(_DeltaClauses(base.clauses, added, removed))
+            added = removed = frozenset()
+
+        object.__setattr__(self, 'base', base)  # noqa: WPS609
+        object.__setattr__(self, 'added', added)  # noqa: WPS609
+        object.__setattr__(self, 'removed', removed)  # noqa: WPS609
+        object.__setattr__(self, 'clauses', _DeltaClauses(base.clauses, added, removed))  # noqa: WPS609
+        object.__setattr__(self, '_hash', None)  # noqa: WPS609
+        object.__setattr__(self, '_str', None)  # noqa: WPS609
+        object.__setattr__(self, '_fingerprint', None)  # noqa: WPS609
+        object.__setattr__(self, '_index', None)  # noqa: WPS609
+        object.__setattr__(self, '_queries', 0)  # noqa: WPS609
+
+    def __hash__(self):
+        """Return the hash computed from the one of the shared cnf and the changes, computing it the first time."""
+        if self._hash is None:
+            clauses_hash = hash(self.base) + _clauses_hash(self.added) - _clauses_hash(self.removed)
+            object.__setattr__(self, '_hash', clauses_hash % HASH_MODULUS)  # noqa: WPS609
+        return self._hash
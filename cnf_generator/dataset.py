@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""Sharded binary dataset of cnf pairs with memory-mapped random access.
+
+Every shard is a single file: a magic string, the length of a JSON header and the header itself, then
+the arrays listed in the header, each at its (8 bytes aligned) offset. Formulas ``2 * i`` and ``2 * i + 1``
+are the two cnfs of the pair ``i``.
+"""
+
+import json
+import os
+import struct
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from .cnf import CNF
+from .exceptions import MalformedCNFException
+from .packed import LITERAL_DTYPE
+from .packed import OFFSET_DTYPE
+from .packed import PackedCNF
+
+SHARD_MAGIC = b'CNFPAIR1'
+SHARD_SUFFIX = '.cnfpairs'
+INDEX_FILE = 'index.json'
+ALIGNMENT = 8
+LABEL_DTYPE = np.int8
+HEADER_LENGTH = struct.Struct('<Q')
+
+Pair = Tuple[CNF, CNF, int]
+PackedPair = Tuple[PackedCNF, PackedCNF, int]
+
+
+def _aligned(position: int) -> int:
+    """Return the first aligned position from the given one."""
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+class ShardWriter:
+    """Collect pairs of cnfs and write them as a shard."""
+
+    def __init__(self, path: str, metadata: Optional[Dict] = None):
+        """Save path and metadata (a JSON serializable dictionary) of the shard."""
+        self.path = path
+        self.metadata = metadata or {}
+        self._formulas: List[PackedCNF] = []
+        self._labels: List[int] = []
+
+    def add(self, first_cnf, second_cnf, pair_type: int):
+        """Add a pair of cnfs (or packed cnfs)."""
+        for cnf in (first_cnf, second_cnf):
+            self._formulas.append(cnf if isinstance(cnf, PackedCNF) else PackedCNF.from_cnf(cnf))
+        self._labels.append(pair_type)
+
+    def __len__(self) -> int:
+        """Return the number of pairs added."""
+        return len(self._labels)
+
+    def write(self):
+        """Write the shard file."""
+        names = [symbol.encode() for formula in self._formulas for symbol in formula.symbols]
+        literals = [formula.literals for formula in self._formulas] or [np.empty(0, dtype=LITERAL_DTYPE)]
+        arrays = {
+            'literals': np.concatenate(literals).astype(LITERAL_DTYPE),
+            'clause_offsets': _concatenated_offsets([formula.clause_lengths for formula in self._formulas]),
+            'formula_offsets': _concatenated_offsets([[formula.num_clauses] for formula in self._formulas]),
+            'symbol_table_offsets': _concatenated_offsets([[formula.num_symbols] for formula in self._formulas]),
+            'name_offsets': _concatenated_offsets([[len(name) for name in names]]),
+            'names': np.frombuffer(b''.join(names), dtype=np.uint8),
+            'labels': np.array(self._labels, dtype=LABEL_DTYPE),
+        }
+
+        sections = {}
+        position = 0
+        for name, values in arrays.items():  # noqa: WPS110
+            sections[name] = {'offset': position, 'dtype': values.dtype.str, 'count': int(values.size)}
+            position = _aligned(position + values.nbytes)
+        header = json.dumps({
+            'num_pairs': len(self._labels),
+            'metadata': self.metadata,
+            'sections': sections,
+        }).encode()
+        data_start = _aligned(len(SHARD_MAGIC) + HEADER_LENGTH.size + len(header))
+
+        with open(self.path, 'wb') as shard_file:
+            shard_file.write(SHARD_MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+            for name, values in arrays.items():  # noqa: WPS110, WPS440
+                shard_file.seek(data_start + sections[name]['offset'])
+                shard_file.write(values.tobytes())
+            shard_file.truncate(data_start + position)
+
+
+def _concatenated_offsets(lengths: Iterable[Iterable[int]]) -> np.ndarray:
+    """Return the offsets (starting from 0) of consecutive items with the given lengths."""
+    all_lengths = [length for group in lengths for length in group]
+    return np.concatenate(([0], np.cumsum(all_lengths, dtype=OFFSET_DTYPE))).astype(OFFSET_DTYPE)
+
+
+class Shard:
+    """Read pairs of a shard by index, memory-mapping the file so that nothing is copied or parsed in advance."""
+
+    def __init__(self, path: str):
+        """Map the file and build views over its arrays."""
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        prefix_length = len(SHARD_MAGIC) + HEADER_LENGTH.size
+        if bytes(self._map[:len(SHARD_MAGIC)]) != SHARD_MAGIC:
+            raise MalformedCNFException(f'{path} is not a shard of cnf pairs.')
+        (header_length,) = HEADER_LENGTH.unpack(bytes(self._map[len(SHARD_MAGIC):prefix_length]))
+        header = json.loads(bytes(self._map[prefix_length:prefix_length + header_length]))
+        data_start = _aligned(prefix_length + header_length)
+
+        self.metadata: Dict = header['metadata']
+        self.num_pairs: int = header['num_pairs']
+        self._arrays = {
+            name: np.frombuffer(
+                self._map, dtype=np.dtype(section['dtype']), count=section['count'],
+                offset=data_start + section['offset'],
+            )
+            for name, section in header['sections'].items()
+        }
+        self.labels = self._arrays['labels']
+
+    def __len__(self) -> int:
+        """Return the number of pairs."""
+        return self.num_pairs
+
+    def formula(self, idx: int) -> PackedCNF:
+        """Return the formula at index as a packed cnf (its buffers are views over the mapped file)."""
+        arrays = self._arrays
+        first_clause, last_clause = arrays['formula_offsets'][idx:idx + 2]
+        offsets = arrays['clause_offsets'][first_clause:last_clause + 1]
+        first_name, last_name = arrays['symbol_table_offsets'][idx:idx + 2]
+        name_offsets = arrays['name_offsets'][first_name:last_name + 1].tolist()
+        names = arrays['names']
+        symbols = [
+            bytes(names[start:end]).decode()
+            for start, end in zip(name_offsets[:-1], name_offsets[1:])
+        ]
+        return PackedCNF(arrays['literals'][offsets[0]:offsets[-1]], offsets - offsets[0], symbols)
+
+    def packed_pair(self, idx: int) -> PackedPair:
+        """Return the pair at index, as packed cnfs."""
+        if not -self.num_pairs <= idx < self.num_pairs:
+            raise IndexError('Pair index out of range.')
+        idx %= self.num_pairs
+        return self.formula(2 * idx), self.formula(2 * idx + 1), int(self.labels[idx])
+
+    def __getitem__(self, idx: int) -> Pair:
+        """Return the pair at index."""
+        first_cnf, second_cnf, pair_type = self.packed_pair(idx)
+        return first_cnf.to_cnf(), second_cnf.to_cnf(), pair_type
+
+    def __iter__(self) -> Iterator[Pair]:
+        """Iterate through the pairs in order."""
+        yield from (self[idx] for idx in range(self.num_pairs))
+
+
+def write_shards(
+    pairs: Iterable[Tuple[object, object, int]],
+    directory: str,
+    pairs_per_shard: int = 100000,
+    metadata: Optional[Dict] = None,
+) -> List[str]:
+    """Write the pairs (for example from ``random_pairs``) as shards in the directory, returning their paths.
+
+    The directory also gets an index with the shards and the number of their pairs.
+    """
+    os.makedirs(directory, exist_ok=True)
+    shards: List[Dict] = []
+    writer = None
+    for first_cnf, second_cnf, pair_type in pairs:
+        if writer is None:
+            writer = ShardWriter(os.path.join(directory, f'shard-{len(shards):05d}{SHARD_SUFFIX}'), metadata)
+        writer.add(first_cnf, second_cnf, pair_type)
+        if len(writer) == pairs_per_shard:
+            writer.write()
+            shards.append({'path': os.path.basename(writer.path), 'num_pairs': len(writer)})
+            writer = None
+    if writer is not None:
+        writer.write()
+        shards.append({'path': os.path.basename(writer.path), 'num_pairs': len(writer)})
+
+    with open(os.path.join(directory, INDEX_FILE), 'w') as index_file:
+        json.dump({'shards': shards, 'metadata': metadata or {}}, index_file, indent=2)
+    return [os.path.join(directory, shard['path']) for shard in shards]
+
+
+class ShardedDataset:
+    """Random access by global index to the pairs of all the shards of a directory."""
+
+    def __init__(self, directory: str):
+        """Open all the shards listed in the index of the directory."""
+        with open(os.path.join(directory, INDEX_FILE)) as index_file:
+            index = json.load(index_file)
+        self.metadata: Dict = index['metadata']
+        self.shards = [Shard(os.path.join(directory, shard['path'])) for shard in index['shards']]
+        self._starts = list(accumulate((len(shard) for shard in self.shards), initial=0))
+
+    def __len__(self) -> int:
+        """Return the number of pairs."""
+        return self._starts[-1]
+
+    def _locate(self, idx: int) -> Tuple[Shard, int]:
+        """Return the shard of the pair at global index and the index inside it."""
+        if not -len(self) <= idx < len(self):
+            raise IndexError('Pair index out of range.')
+        idx %= len(self)
+        shard_idx = bisect_right(self._starts, idx) - 1
+        return self.shards[shard_idx], idx - self._starts[shard_idx]
+
+    def packed_pair(self, idx: int) -> PackedPair:
+        """Return the pair at global index, as packed cnfs."""
+        shard, local_idx = self._locate(idx)
+        return shard.packed_pair(local_idx)
+
+    def __getitem__(self, idx: int) -> Pair:
+        """Return the pair at global index."""
+        shard, local_idx = self._locate(idx)
+        return shard[local_idx]
+
+    def __iter__(self) -> Iterator[Pair]:
+        """Iterate through the pairs in order."""
+        for shard in self.shards:
+            yield from shard
+
+    def shuffled(self, random_seed: Optional[int] = None, packed: bool = False) -> Iterator:
+        """Iterate through all the pairs (or packed pairs) of all the shards in a random order."""
+        get_pair = self.packed_pair if packed else self.__getitem__
+        for idx in np.random.default_rng(random_seed).permutation(len(self)).tolist():
+            yield get_pair(idx)
@@ -25,3 +25,7 @@ class NoSymbolsOrderException(CNFGenException):
 
 class LiteralNotPossibleToAddException(CNFGenException):
     """There is no suitable order for symbols."""
+
+
+class SearchLimitExceededException(CNFGenException):
+    """The search did not finish within the allowed number of nodes."""
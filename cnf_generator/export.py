@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""Export of batches of cnf pairs as NumPy arrays ready for machine learning."""
+
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+from .cnf import CNF
+from .exceptions import CNFGenException
+from .packed import LITERAL_DTYPE
+from .packed import OFFSET_DTYPE
+from .packed import PackedCNF
+
+POLARITY_DTYPE = np.int8
+LABEL_DTYPE = np.int64
+
+FormulaPair = Tuple[Union[CNF, PackedCNF], Union[CNF, PackedCNF], int]
+
+
+@dataclass
+class FormulaBatch:
+    """Represent a batch of formulas as arrays.
+
+    Variables are numbered from 0 across the whole batch: the variables of formula ``i`` are the ones from
+    ``symbol_offsets[i]`` to ``symbol_offsets[i + 1]``, in the order of its symbol table. In the same way the
+    clauses of formula ``i`` are the rows from ``clause_offsets[i]`` to ``clause_offsets[i + 1]`` of the
+    clause-variable incidence matrix, stored in CSR form (``indptr``, ``indices``, ``polarity``). A clause with
+    both polarities of a variable has two entries for it, which must not be summed.
+    """
+
+    literals: np.ndarray
+    clause_widths: np.ndarray
+    num_clauses: np.ndarray
+    num_symbols: np.ndarray
+    clause_offsets: np.ndarray
+    symbol_offsets: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    polarity: np.ndarray
+
+
+@dataclass
+class PairBatch:
+    """Represent a batch of pairs of formulas as arrays, with the pair types as labels."""
+
+    first: FormulaBatch
+    second: FormulaBatch
+    labels: np.ndarray
+
+
+class PairBatchExporter:
+    """Export batches of pairs of cnfs into buffers allocated once and reused across batches.
+
+    The arrays returned by ``export`` are views over the buffers of the exporter: they are valid until the
+    next export, so they must be copied to be kept. The padded ``literals`` arrays have shape
+    (batch, max_clauses, max_width), with 0 as padding: fixed if max_clauses and max_width are given,
+    otherwise the largest ones of every batch.
+    """
+
+    def __init__(self, max_clauses: Optional[int] = None, max_width: Optional[int] = None):
+        """Save the fixed padding sizes, if any."""
+        self.max_clauses = max_clauses
+        self.max_width = max_width
+        self._buffers: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def _buffer(self, side: str, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """Return a view with the shape over a reusable buffer, growing it if too small."""
+        size = int(np.prod(shape))
+        buffer = self._buffers.get((side, name))
+        if buffer is None or buffer.size < size:
+            buffer = np.empty(max(size, 2 * (0 if buffer is None else buffer.size)), dtype=dtype)
+            self._buffers[(side, name)] = buffer
+        return buffer[:size].reshape(shape)
+
+    def _offsets(self, side: str, name: str, lengths: np.ndarray) -> np.ndarray:
+        """Return the offsets (starting from 0) of consecutive items with the lengths, in a reusable buffer."""
+        offsets = self._buffer(side, name, (lengths.size + 1,), OFFSET_DTYPE)
+        offsets[0] = 0
+        np.cumsum(lengths, out=offsets[1:])
+        return offsets
+
+    def _export_formulas(self, side: str, formulas: Sequence[PackedCNF]) -> FormulaBatch:  # noqa: WPS210
+        """Export formulas in one vectorized pass over their concatenated buffers."""
+        batch_size = len(formulas)
+        num_clauses = self._buffer(side, 'num_clauses', (batch_size,), OFFSET_DTYPE)
+        num_clauses[:] = [formula.num_clauses for formula in formulas]
+        num_symbols = self._buffer(side, 'num_symbols', (batch_size,), OFFSET_DTYPE)
+        num_symbols[:] = [formula.num_symbols for formula in formulas]
+        clause_offsets = self._offsets(side, 'clause_offsets', num_clauses)
+        symbol_offsets = self._offsets(side, 'symbol_offsets', num_symbols)
+        total_clauses = int(clause_offsets[-1])
+
+        widths = self._buffer(side, 'widths', (total_clauses,), OFFSET_DTYPE)
+        if batch_size:
+            np.concatenate([formula.clause_lengths for formula in formulas], out=widths)
+        indptr = self._offsets(side, 'indptr', widths)
+        total_literals = int(indptr[-1])
+        literals = self._buffer(side, 'all_literals', (total_literals,), LITERAL_DTYPE)
+        if batch_size:
+            np.concatenate([formula.literals for formula in formulas], out=literals)
+
+        max_clauses = int(num_clauses.max(initial=0))
+        max_width = int(widths.max(initial=0))
+        if (self.max_clauses is not None and max_clauses > self.max_clauses) or (
+            self.max_width is not None and max_width > self.max_width
+        ):
+            raise CNFGenException('Formulas larger than the fixed padding sizes.')
+        if self.max_clauses is not None:
+            max_clauses = self.max_clauses
+        if self.max_width is not None:
+            max_width = self.max_width
+
+        clause_formula = np.repeat(np.arange(batch_size), num_clauses)
+        local_clause = np.arange(total_clauses) - clause_offsets[clause_formula]
+        literal_clause = np.repeat(np.arange(total_clauses), widths)
+        position = np.arange(total_literals) - indptr[literal_clause]
+
+        padded = self._buffer(side, 'literals', (batch_size, max_clauses, max_width), LITERAL_DTYPE)
+        padded.fill(0)
+        padded[clause_formula[literal_clause], local_clause[literal_clause], position] = literals
+        clause_widths = self._buffer(side, 'clause_widths', (batch_size, max_clauses), OFFSET_DTYPE)
+        clause_widths.fill(0)
+        clause_widths[clause_formula, local_clause] = widths
+
+        indices = self._buffer(side, 'indices', (total_literals,), OFFSET_DTYPE)
+        np.abs(literals, out=indices, casting='unsafe')
+        indices += symbol_offsets[clause_formula[literal_clause]] - 1
+        polarity = self._buffer(side, 'polarity', (total_literals,), POLARITY_DTYPE)
+        np.sign(literals, out=polarity, casting='unsafe')
+
+        return FormulaBatch(
+            literals=padded,
+            clause_widths=clause_widths,
+            num_clauses=num_clauses,
+            num_symbols=num_symbols,
+            clause_offsets=clause_offsets,
+            symbol_offsets=symbol_offsets,
+            indptr=indptr,
+            indices=indices,
+            polarity=polarity,
+        )
+
+    def export(self, pairs: Sequence[FormulaPair]) -> PairBatch:
+        """Export a batch of pairs (of cnfs or packed cnfs, as returned by ``random_pairs``)."""
+        first_formulas: List[PackedCNF] = []
+        second_formulas: List[PackedCNF] = []
+        for first_cnf, second_cnf, _ in pairs:
+            first_formulas.append(first_cnf if isinstance(first_cnf, PackedCNF) else PackedCNF.from_cnf(first_cnf))
+            second_formulas.append(
+                second_cnf if isinstance(second_cnf, PackedCNF) else PackedCNF.from_cnf(second_cnf),
+            )
+        labels = self._buffer('pair', 'labels', (len(pairs),), LABEL_DTYPE)
+        labels[:] = [pair_type for _, _, pair_type in pairs]
+        return PairBatch(
+            first=self._export_formulas('first', first_formulas),
+            second=self._export_formulas('second', second_formulas),
+            labels=labels,
+        )
+
+    def batches(self, pairs: Iterable[FormulaPair], batch_size: int) -> Iterator[PairBatch]:
+        """Iterate through the exported batches of batch_size pairs (the last one can be smaller)."""
+        pairs_iterator = iter(pairs)
+        while True:
+            batch = list(islice(pairs_iterator, batch_size))
+            if not batch:
+                return
+            yield self.export(batch)
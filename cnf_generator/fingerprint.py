@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""Fingerprints of cnf formulas invariant under renaming and negation of symbols."""
+
+from hashlib import blake2b
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+FINGERPRINT_SIZE = 16
+
+
+def _relabel(signatures: Sequence[Tuple[Any, ...]], digest) -> List[int]:
+    """Replace every signature with its rank among the distinct signatures, adding them to the digest."""
+    distinct = sorted(set(signatures))
+    digest.update(repr(distinct).encode())
+    ranks = {signature: rank for rank, signature in enumerate(distinct)}
+    return [ranks[signature] for signature in signatures]
+
+
+def _literal_ids(cnf) -> Tuple[List[List[int]], List[str]]:
+    """Return the clauses as lists of literal ids (2 * symbol index, plus one if negated) and the symbols."""
+    symbols: Dict[str, int] = {}
+    clauses = []
+    for clause in cnf.clauses:
+        clauses.append([
+            symbols.setdefault(literal.symbol, len(symbols)) * 2 + int(literal.is_negated)
+            for literal in clause.literals
+        ])
+    return clauses, list(symbols)
+
+
+def refined_colors(cnf) -> Tuple[Dict[Tuple[str, bool], int], List[int], str]:
+    """Return the stable colors of the literals and of the clauses of a cnf, with a digest of the refinement.
+
+    The colors are computed by iterative color refinement over the literal-clause incidence graph, where
+    every literal is also linked to its negation, so that they do not depend on the names of the symbols
+    nor on their polarity. Two isomorphic cnfs have the same colors for corresponding literals and clauses,
+    and the same digest.
+    """
+    clauses, symbols = _literal_ids(cnf)
+    num_literals = len(symbols) * 2
+    occurrences: List[List[int]] = [[] for _ in range(num_literals)]
+    for clause_idx, clause in enumerate(clauses):
+        for literal in clause:
+            occurrences[literal].append(clause_idx)
+
+    digest = blake2b(digest_size=FINGERPRINT_SIZE)
+    digest.update(repr((len(clauses), num_literals)).encode())
+    colors = _relabel([(len(occurrences[lit]), len(occurrences[lit ^ 1])) for lit in range(num_literals)], digest)
+    num_colors = len(set(colors))
+    while True:
+        clause_colors = _relabel([tuple(sorted(colors[lit] for lit in clause)) for clause in clauses], digest)
+        new_colors = _relabel(
+            [
+                (colors[lit], colors[lit ^ 1], tuple(sorted(clause_colors[idx] for idx in occurrences[lit])))
+                for lit in range(num_literals)
+            ],
+            digest,
+        )
+        new_num_colors = len(set(new_colors))
+        colors = new_colors
+        if new_num_colors <= num_colors:
+            break
+        num_colors = new_num_colors
+
+    literal_colors: Dict[Tuple[str, bool], int] = {}
+    for symbol_idx, symbol in enumerate(symbols):
+        literal_colors[(symbol, False)] = colors[symbol_idx * 2]
+        literal_colors[(symbol, True)] = colors[symbol_idx * 2 + 1]
+    return literal_colors, clause_colors, digest.hexdigest()
+
+
+def cnf_fingerprint(cnf) -> str:
+    """Return a fingerprint of the cnf that is the same for all the cnfs isomorphic to it."""
+    return refined_colors(cnf)[2]
+
+
+def could_be_isomorphic(first_cnf, second_cnf) -> bool:
+    """Return False if the two cnfs are certainly not isomorphic, True if they could be."""
+    if len(first_cnf.clauses) != len(second_cnf.clauses):
+        return False
+    first_widths = sorted(len(clause.literals) for clause in first_cnf.clauses)
+    if first_widths != sorted(len(clause.literals) for clause in second_cnf.clauses):
+        return False
+    return first_cnf.fingerprint() == second_cnf.fingerprint()
@@ -2,15 +2,19 @@
 
 """Implementation of the isomorphic cnf generation."""
 
-from random import randint
-from random import shuffle
+from random import Random
 from typing import Dict
-from typing import List
+from typing import Optional
+from typing import Sequence
 
 from .cnf import CNF
 from .cnf import STD_SYMBOLS
 from .cnf import Clause
 from .cnf import Literal
+from .exceptions import GenerationFailedException
+from .sampling import global_rng
+from .stats import instrumented
+from .symbols import sample_symbols
 
 
 def _map_literal(old_literal: Literal, symbols_mapping: Dict[str, str], inversion_mapping: Dict[str, bool]):
@@ -21,19 +25,30 @@ def _map_literal(old_literal: Literal, symbols_mapping: Dict[str, str], inversio
     )
 
 
-def cnf_isomorphic_generator(original_cnf: CNF, new_symbols: List[str] = None, monotone: bool = False, **kwargs) -> CNF:
-    """Return a new cnf isomorph to the original."""
-    old_symbols_set = {literal.symbol for literal in original_cnf.literals}
-    old_symbols = list(old_symbols_set)
+@instrumented
+def cnf_isomorphic_generator(
+    original_cnf: CNF,
+    new_symbols: Optional[Sequence[str]] = None,
+    monotone: bool = False,
+    rng: Optional[Random] = None,
+    **kwargs,
+) -> CNF:
+    """Return a new cnf isomorph to the original, with symbols from new_symbols (or the symbols of random_cnf).
 
-    new_symbols = new_symbols or list(STD_SYMBOLS)
-    new_symbols = new_symbols[:]
-    shuffle(new_symbols)
+    Random choices are made with rng (the generator of the random module if not given).
+    """
+    rng = global_rng() if rng is None else rng
+    old_symbols = sorted({literal.symbol for literal in original_cnf.literals})
+
+    new_symbols = new_symbols or kwargs.get('symbols') or sorted(STD_SYMBOLS)
+    if len(new_symbols) < len(old_symbols):
+        raise GenerationFailedException(f'Only {len(new_symbols)} symbols for {len(old_symbols)} symbols of the cnf.')
+    new_symbols = sample_symbols(rng, new_symbols, len(old_symbols))
 
     mapping = {old_s: new_s for old_s, new_s in zip(old_symbols, new_symbols)}
     inverted = {}
     if not monotone:
-        inverted = {old_s: bool(randint(0, 1)) for old_s in mapping}
+        inverted = {old_s: bool(rng.randint(0, 1)) for old_s in mapping}
 
     clauses = set()
     for old_clause in original_cnf.clauses:
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+"""Exact check of isomorphism (renaming and negation of symbols) between cnfs."""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from .cnf import CNF
+from .cnf import Literal
+from .exceptions import SearchLimitExceededException
+from .fingerprint import refined_colors
+
+ISOMORPHIC_PAIR_TYPE = 0
+
+SymbolTarget = Tuple[str, bool]
+
+
+@dataclass
+class IsomorphismStats:
+    """Represent the statistics of the checks done by an isomorphism checker."""
+
+    checks: int = 0
+    isomorphic: int = 0
+    rejected_without_search: int = 0
+    search_nodes: int = 0
+    max_search_nodes: int = 0
+    elapsed: float = 0
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of checks per second."""
+        if not self.elapsed:
+            return 0
+        return self.checks / self.elapsed
+
+    def __str__(self) -> str:
+        """Return a short report of the statistics."""
+        return (
+            f'{self.checks} checks ({self.isomorphic} isomorphic, {self.rejected_without_search} rejected '
+            + f'without search) in {self.elapsed:.3f}s, {self.throughput:.1f} checks/s, '
+            + f'{self.search_nodes} search nodes (max {self.max_search_nodes} in a check)'
+        )
+
+
+class _Search:
+    """Represent the backtracking search of a mapping from the symbols of a cnf to the ones of another."""
+
+    def __init__(self, first_cnf: CNF, candidates: Dict[str, List[SymbolTarget]], second_cnf: CNF):
+        """Build the structures needed to check clauses while assigning symbols."""
+        self.candidates = candidates
+        self.clauses: List[Tuple[Tuple[str, bool], ...]] = []
+        self.symbol_clauses: Dict[str, List[int]] = defaultdict(list)
+        for clause_idx, clause in enumerate(first_cnf.clauses):
+            self.clauses.append(tuple((literal.symbol, literal.is_negated) for literal in clause.literals))
+            for symbol in set(clause.symbols):
+                self.symbol_clauses[symbol].append(clause_idx)
+        self.target_clauses: Set[FrozenSet[Tuple[str, bool]]] = {
+            frozenset((literal.symbol, literal.is_negated) for literal in clause.literals)
+            for clause in second_cnf.clauses
+        }
+        self.unassigned = [len({symbol for symbol, _ in clause}) for clause in self.clauses]
+        self.mapping: Dict[str, SymbolTarget] = {}
+        self.used: Set[str] = set()
+        self.nodes = 0
+
+    def _assign(self, symbol: str, target: SymbolTarget) -> bool:
+        """Assign the symbol, returning False if a clause with all symbols assigned has no image."""
+        self.mapping[symbol] = target
+        self.used.add(target[0])
+        consistent = True
+        for clause_idx in self.symbol_clauses[symbol]:
+            self.unassigned[clause_idx] -= 1
+            if consistent and not self.unassigned[clause_idx]:
+                consistent = self._image(self.clauses[clause_idx]) in self.target_clauses
+        return consistent
+
+    def _unassign(self, symbol: str):
+        """Undo the assignment of the symbol."""
+        target_symbol, _ = self.mapping.pop(symbol)
+        self.used.discard(target_symbol)
+        for clause_idx in self.symbol_clauses[symbol]:
+            self.unassigned[clause_idx] += 1
+
+    def _image(self, clause: Tuple[Tuple[str, bool], ...]) -> FrozenSet[Tuple[str, bool]]:
+        """Return the clause mapped with the current assignment."""
+        image = []
+        for symbol, is_negated in clause:
+            target_symbol, flip = self.mapping[symbol]
+            image.append((target_symbol, is_negated ^ flip))
+        return frozenset(image)
+
+    def run(self, max_nodes: Optional[int] = None) -> Optional[Dict[str, SymbolTarget]]:
+        """Return the first complete mapping found, None if there are no one."""
+        order = sorted(self.candidates, key=lambda symbol: len(self.candidates[symbol]))
+        if not order:
+            return {}
+        iterators: List[Iterator[SymbolTarget]] = [iter(self.candidates[order[0]])]
+        while iterators:
+            depth = len(iterators) - 1
+            symbol = order[depth]
+            if symbol in self.mapping:
+                self._unassign(symbol)
+            if not self._assign_next(symbol, iterators[-1], max_nodes):
+                iterators.pop()
+                continue
+            if depth + 1 == len(order):
+                return dict(self.mapping)
+            iterators.append(iter(self.candidates[order[depth + 1]]))
+        return None
+
+    def _assign_next(self, symbol: str, targets: Iterator[SymbolTarget], max_nodes: Optional[int]) -> bool:
+        """Assign the symbol to the next consistent target, returning False if there are no one."""
+        for target in targets:
+            if target[0] in self.used:
+                continue
+            self.nodes += 1
+            if max_nodes is not None and self.nodes > max_nodes:
+                raise SearchLimitExceededException(f'More than {max_nodes} search nodes.')
+            if self._assign(symbol, target):
+                return True
+            self._unassign(symbol)
+        return False
+
+
+def _candidates(first_colors, second_colors) -> Optional[Dict[str, List[SymbolTarget]]]:
+    """Return the possible targets of every symbol, None if a symbol has no one."""
+    by_colors: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+    for symbol, is_negated in second_colors:
+        if not is_negated:
+            by_colors[(second_colors[(symbol, False)], second_colors[(symbol, True)])].append(symbol)
+
+    candidates: Dict[str, List[SymbolTarget]] = {}
+    for symbol, is_negated in first_colors:
+        if is_negated:
+            continue
+        pos_color = first_colors[(symbol, False)]
+        neg_color = first_colors[(symbol, True)]
+        targets = [(target, False) for target in by_colors.get((pos_color, neg_color), ())]
+        targets.extend((target, True) for target in by_colors.get((neg_color, pos_color), ()))
+        if not targets:
+            return None
+        candidates[symbol] = targets
+    return candidates
+
+
+class IsomorphismChecker:
+    """Check exactly if cnfs are isomorphic, collecting statistics about the checks."""
+
+    def __init__(self, max_nodes: Optional[int] = None):
+        """Save the limit of search nodes for every check (None for no limit)."""
+        self.max_nodes = max_nodes
+        self.stats = IsomorphismStats()
+
+    def find_isomorphism(self, first_cnf: CNF, second_cnf: CNF) -> Optional[Dict[str, Literal]]:
+        """Return a mapping from the symbols of the first cnf to the literals replacing them, None if not isomorphic."""
+        start = perf_counter()
+        nodes = 0
+        try:
+            mapping, nodes = self._find(first_cnf, second_cnf)
+        finally:
+            self.stats.checks += 1
+            self.stats.search_nodes += nodes
+            self.stats.max_search_nodes = max(self.stats.max_search_nodes, nodes)
+            self.stats.elapsed += perf_counter() - start
+        if mapping is None:
+            return None
+        self.stats.isomorphic += 1
+        return {symbol: Literal(target, flip) for symbol, (target, flip) in mapping.items()}
+
+    def are_isomorphic(self, first_cnf: CNF, second_cnf: CNF) -> bool:
+        """Return True if the cnfs are isomorphic."""
+        return self.find_isomorphism(first_cnf, second_cnf) is not None
+
+    def audit_pairs(self, pairs: Iterable[Tuple[CNF, CNF, int]]) -> List[int]:
+        """Return the indexes of the pairs whose type does not match the isomorphism of their cnfs."""
+        return [
+            idx
+            for idx, (first_cnf, second_cnf, pair_type) in enumerate(pairs)
+            if self.are_isomorphic(first_cnf, second_cnf) != (pair_type == ISOMORPHIC_PAIR_TYPE)
+        ]
+
+    def _find(self, first_cnf: CNF, second_cnf: CNF) -> Tuple[Optional[Dict[str, SymbolTarget]], int]:
+        """Return the mapping found (or None) and the number of search nodes."""
+        if len(first_cnf.clauses) != len(second_cnf.clauses):
+            self.stats.rejected_without_search += 1
+            return None, 0
+        first_colors, _, first_digest = refined_colors(first_cnf)
+        second_colors, _, second_digest = refined_colors(second_cnf)
+        if first_digest != second_digest:
+            self.stats.rejected_without_search += 1
+            return None, 0
+        candidates = _candidates(first_colors, second_colors)
+        if candidates is None:
+            self.stats.rejected_without_search += 1
+            return None, 0
+        search = _Search(first_cnf, candidates, second_cnf)
+        try:
+            return search.run(self.max_nodes), search.nodes
+        except SearchLimitExceededException:
+            self.stats.search_nodes += search.nodes
+            raise
+
+
+def are_isomorphic(first_cnf: CNF, second_cnf: CNF) -> bool:
+    """Return True if the cnfs are isomorphic."""
+    return IsomorphismChecker().are_isomorphic(first_cnf, second_cnf)
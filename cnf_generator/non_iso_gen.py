@@ -2,54 +2,59 @@
 
 """Implementation of the non isomorphic cnf generation."""
 
-from random import choice
-from random import choices
-from random import shuffle
-from typing import Set
+from collections import Counter
+from random import Random
+from typing import Optional
+from typing import Sequence
 
 from .cnf import CNF
 from .cnf import STD_SYMBOLS
 from .cnf import Clause
+from .cnf import DeltaCNF
 from .cnf import Literal
+from .cnf import clause_sort_key
+from .cnf import literal_sort_key
 from .exceptions import GenerationFailedException
 from .exceptions import LiteralNotPossibleToAddException
 from .non_iso_gen_paper import non_trivial_non_isomorphic_cnf_generator
+from .sampling import global_rng
+from .sampling import sample_distinct_clauses
+from .sampling import sample_widths
+from .stats import instrumented
+from .symbols import unused_symbol
 
 
-def cnf_generator_trivial_add_clause(original_cnf: CNF) -> CNF:
+@instrumented
+def cnf_generator_trivial_add_clause(original_cnf: CNF, rng: Optional[Random] = None, **kwargs) -> CNF:
     """Generate a new cnf trivially non isomorph to the original by adding a new clause."""
-    literals_set = list(set(original_cnf.literals))
+    literals_list = sorted(set(original_cnf.literals), key=literal_sort_key)
+    literals_codes = {literal: code for code, literal in enumerate(literals_list)}
+    existing = [[literals_codes[literal] for literal in clause.literals] for clause in original_cnf.clauses]
 
-    clauses_length = [len(clause.literals) for clause in original_cnf.clauses]
-    new_clause_len = choice(clauses_length)
+    # the width is drawn as often as it appears, skipping widths whose clauses are all already in the cnf
+    clauses_length = sorted(len(clause) for clause in existing)
+    rng = global_rng() if rng is None else rng
+    widths = sample_widths(rng, 1, clauses_length, len(literals_list), excluded=Counter(clauses_length))
+    new_codes = sample_distinct_clauses(rng, len(literals_list), widths, excluded=existing)[0]
+    new_clause = Clause({literals_list[code] for code in new_codes})
 
-    # TODO: if the cnf already has all the possible clauses the it will be continue forever
-    prev_clauses_len = len(original_cnf.clauses)
-    clauses: Set[Clause] = set()
-    while prev_clauses_len == len(clauses):
-        new_clause_literals = set(choices(literals_set, k=new_clause_len))
-        new_clause = Clause(new_clause_literals)
-        clauses.add(new_clause)
-
-    return CNF(clauses)
+    return DeltaCNF(original_cnf, added=(new_clause,))
 
 
 def _add_literal_to_the_first_clause_available(cnf: CNF, literal: Literal) -> CNF:
-    """Add literal to the first clause that does not already include it, returning the new cnf."""
-    clauses = set(cnf.clauses)
-    for clause in clauses:
-        literals = set(clause.literals)
-        if literal not in literals:
-            literals.add(literal)
-            clauses = (clauses - {clause}) | {Clause(literals)}
-            return CNF(clauses)
-    raise LiteralNotPossibleToAddException
-
-
-def cnf_generator_trivial_add_literal_occurrence(original_cnf: CNF) -> CNF:
+    """Add literal to the first clause (in the order of clause_sort_key) that does not already include it."""
+    available = [clause for clause in cnf.clauses if literal not in clause.literals]
+    if not available:
+        raise LiteralNotPossibleToAddException
+    clause = min(available, key=clause_sort_key)
+    return DeltaCNF(cnf, added=(Clause(clause.literals | {literal}),), removed=(clause,))
+
+
+@instrumented
+def cnf_generator_trivial_add_literal_occurrence(original_cnf: CNF, rng: Optional[Random] = None, **kwargs) -> CNF:
     """Generate a new cnf trivially non isomorph to the original by adding a literal coccurrence to a clause."""
-    literals_list = list(set(original_cnf.literals))
-    shuffle(literals_list)
+    literals_list = sorted(set(original_cnf.literals), key=literal_sort_key)
+    (global_rng() if rng is None else rng).shuffle(literals_list)
 
     for new_literal in literals_list:
         try:
@@ -60,25 +65,36 @@ def cnf_generator_trivial_add_literal_occurrence(original_cnf: CNF) -> CNF:
     raise GenerationFailedException()
 
 
-def cnf_generator_trivial_add_new_symbol(original_cnf: CNF) -> CNF:
-    """Generate a new cnf trivially non isomorph to the original by adding a new symbol to a clause."""
+@instrumented
+def cnf_generator_trivial_add_new_symbol(
+    original_cnf: CNF,
+    new_symbols: Optional[Sequence[str]] = None,
+    rng: Optional[Random] = None,
+    **kwargs,
+) -> CNF:
+    """Generate a new cnf trivially non isomorph to the original by adding a new symbol to a clause.
+
+    The new symbol is taken from new_symbols (or the symbols of random_cnf).
+    """
     symbols = {literal.symbol for literal in original_cnf.literals}
-    available_symbols = list(set(STD_SYMBOLS) - symbols)
+    new_symbols = new_symbols or kwargs.get('symbols') or sorted(STD_SYMBOLS)
 
-    new_symbol = choice(available_symbols)
+    new_symbol = unused_symbol(global_rng() if rng is None else rng, new_symbols, symbols)
     new_literal = Literal(new_symbol)
 
     return _add_literal_to_the_first_clause_available(original_cnf, new_literal)
 
 
-def cnf_generator_trivial(cnf: CNF, **kwargs) -> CNF:
+@instrumented
+def cnf_generator_trivial(cnf: CNF, rng: Optional[Random] = None, **kwargs) -> CNF:
     """Generate a new cnf trivially non isomorph to the original applying a random generator."""
-    cnf_gen_func = choice((
+    rng = global_rng() if rng is None else rng
+    cnf_gen_func = rng.choice((
         cnf_generator_trivial_add_clause,
         cnf_generator_trivial_add_literal_occurrence,
         cnf_generator_trivial_add_new_symbol,
     ))
-    return cnf_gen_func(cnf)
+    return cnf_gen_func(cnf, rng=rng, **kwargs)
 
 
 def cnf_generator(cnf: CNF, trivial_non_isomorphism=False) -> CNF:
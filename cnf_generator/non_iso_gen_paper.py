@@ -2,20 +2,37 @@
 
 """Implementation of the non isomorphic cnf generation from the paper."""
 
+from collections import OrderedDict
 from collections import defaultdict
 from dataclasses import dataclass
 from itertools import combinations
+from random import Random
+from threading import Lock
 from typing import Dict
 from typing import Iterator
 from typing import List
+from typing import Optional
+from typing import Set
 from typing import Tuple
 
 from .cnf import CNF
 from .cnf import Clause
+from .cnf import DeltaCNF
 from .cnf import Literal
+from .cnf import clause_sort_key
 from .exceptions import GenerationFailedException
 from .exceptions import NoSymbolsOrderException
 from .iso_gen import cnf_isomorphic_generator
+from .sampling import global_rng
+from .stats import count
+from .stats import instrumented
+
+SWAP_ANALYSIS_CACHE_SIZE = 128
+
+SwapCandidate = Tuple[Literal, Literal, Clause]
+
+_swap_analyses: 'OrderedDict[CNF, SwapAnalysis]' = OrderedDict()
+_swap_analyses_lock = Lock()
 
 
 @dataclass
@@ -47,6 +64,7 @@ class CardinalityRepository:
         for clause in cnf.clauses:
             for literal in clause.literals:  # noqa: WPS440
                 self.clauses_index[(literal.symbol, literal.is_negated)].add(clause)
+        self._vectors: Dict[Tuple[Clause, Literal], Tuple[int, ...]] = {}
 
     def clauses(self, symbol, negated=None):
         """Return the set of clauses that contains the symbol."""
@@ -54,6 +72,19 @@ class CardinalityRepository:
             return self.clauses_index[(symbol, True)] | self.clauses_index[(symbol, False)]
         return self.clauses_index[(symbol, bool(negated))]
 
+    def exclusive_clauses(self, included: Literal, excluded: Literal) -> Set[Clause]:
+        """Return the set of clauses that contains the included literal but not the excluded one."""
+        included_clauses = self.clauses_index.get((included.symbol, included.is_negated), set())
+        return included_clauses - self.clauses_index.get((excluded.symbol, excluded.is_negated), set())
+
+    def signatures(self) -> Dict[Tuple[int, int], List[str]]:
+        """Return the sorted symbols grouped by their (positive, negated) cardinalities, in order of cardinalities."""
+        groups: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        for symbol in sorted(self.counters):
+            lit_count = self.counters[symbol]
+            groups[(lit_count.pos_counter, lit_count.neg_counter)].append(symbol)
+        return dict(sorted(groups.items()))
+
     def literal_count(self, literal):
         """Return the cardinality of the literal."""
         if literal.is_negated:
@@ -65,12 +96,19 @@ class CardinalityRepository:
         space = []
         space_clauses = []
         for clause in clauses:
-            all_counts = (self.literal_count(lit) for lit in clause.literals if lit != literal)
-            t_lit = tuple(sorted(all_counts))
-            space.append(t_lit)
+            space.append(self.clause_vector(clause, literal))
             space_clauses.append(clause)
         return space, space_clauses
 
+    def clause_vector(self, clause, literal):
+        """Return the sorted cardinalities of the literals of the clause excluding the literal, caching them."""
+        key = (clause, literal)
+        vector = self._vectors.get(key)
+        if vector is None:
+            vector = tuple(sorted(self.literal_count(lit) for lit in clause.literals if lit != literal))
+            self._vectors[key] = vector
+        return vector
+
 
 def _correct_order_of_symbols(  # noqa: WPS212,WPS231
     a_sym: str,
@@ -102,58 +140,194 @@ def _correct_order_of_symbols(  # noqa: WPS212,WPS231
     raise NoSymbolsOrderException
 
 
-def _swappable_pair_of_literals(  # noqa: WPS231
-    cnf: CNF,
-    repository: CardinalityRepository,
-) -> Iterator[Tuple[Literal, Literal, Clause]]:
-    """Iterate through the pair of literals that could be swapped."""
-    symbols = set(repository.counters.keys())
-    for a_sym, b_sym in combinations(symbols, 2):
-        a_count = repository.counters[a_sym]
-        b_count = repository.counters[b_sym]
+def _orderable_pairs_of_symbols(repository: CardinalityRepository) -> Iterator[Tuple[Literal, Literal]]:
+    """Iterate through the ordered pairs of literals of symbols that have a correct order.
 
+    The order depends only on the counters, so it is checked once for every pair of distinct signatures
+    (symbols with the same signature never have a correct order).
+    """
+    signatures = repository.signatures()
+    for a_signature, b_signature in combinations(signatures, 2):
+        a_count = LiteralCounter(*a_signature)
+        b_count = LiteralCounter(*b_signature)
+        a_symbols = signatures[a_signature]
+        b_symbols = signatures[b_signature]
         try:
-            alpha, beta = _correct_order_of_symbols(a_sym, b_sym, a_count, b_count)
+            _correct_order_of_symbols(a_symbols[0], b_symbols[0], a_count, b_count)
         except NoSymbolsOrderException:
             continue
+        for a_sym in a_symbols:
+            for b_sym in b_symbols:
+                yield _correct_order_of_symbols(a_sym, b_sym, a_count, b_count)
 
-        c_alpha = set(cnf.filtered_clauses_by_literals(included={alpha}, excluded={beta}))
-        c_beta = set(cnf.filtered_clauses_by_literals(included={beta}, excluded={alpha}))
-        if (not c_alpha) or (not c_beta):
-            continue
 
-        v_alpha, v_clauses_alpha = repository.vec_space(c_alpha, alpha)
-        v_beta, _ = repository.vec_space(c_beta, beta)
-        v_alpha_non_beta = set(v_alpha) - set(v_beta)
-        if not v_alpha_non_beta:
-            continue
+def _u_clauses(repository: CardinalityRepository, alpha: Literal, beta: Literal) -> List[Clause]:
+    """Return the clauses usable as u clause to swap alpha and beta, sorted with clause_sort_key."""
+    c_alpha = repository.exclusive_clauses(alpha, beta)
+    if not c_alpha:
+        return []
+    c_beta = repository.exclusive_clauses(beta, alpha)
+    if not c_beta:
+        return []
+
+    v_beta, _ = repository.vec_space(c_beta, beta)
+    v_beta_set = set(v_beta)
+    v_alpha, v_clauses_alpha = repository.vec_space(sorted(c_alpha, key=clause_sort_key), alpha)
+    return [u_clause for vector, u_clause in zip(v_alpha, v_clauses_alpha) if vector not in v_beta_set]
+
+
+def _swappable_pair_of_literals(
+    cnf: CNF,
+    repository: CardinalityRepository,
+) -> Iterator[SwapCandidate]:
+    """Iterate through the pairs of literals that could be swapped, with every clause usable as u clause."""
+    examined = 0
+    try:
+        for alpha, beta in _orderable_pairs_of_symbols(repository):
+            examined += 1
+            for u_clause in _u_clauses(repository, alpha, beta):
+                yield alpha, beta, u_clause
+    finally:
+        count('swappable_pair_of_literals.examined_pairs', examined)
+
+
+def _random_swap_candidate(repository: CardinalityRepository, rng: Random) -> Optional[SwapCandidate]:
+    """Return a random swap candidate, or None if there are no one.
+
+    Pairs of signatures and then pairs of their symbols are tried in a random order, stopping at the first
+    pair of literals with a u clause, so the candidates are not all listed.
+    """
+    signatures = repository.signatures()
+    signature_pairs = list(combinations(signatures, 2))
+    rng.shuffle(signature_pairs)
+    examined = 0
+    try:
+        for a_signature, b_signature in signature_pairs:
+            a_count = LiteralCounter(*a_signature)
+            b_count = LiteralCounter(*b_signature)
+            a_symbols = signatures[a_signature][:]
+            b_symbols = signatures[b_signature][:]
+            try:
+                _correct_order_of_symbols(a_symbols[0], b_symbols[0], a_count, b_count)
+            except NoSymbolsOrderException:
+                continue
+            rng.shuffle(a_symbols)
+            rng.shuffle(b_symbols)
+            for a_sym in a_symbols:
+                for b_sym in b_symbols:
+                    examined += 1
+                    alpha, beta = _correct_order_of_symbols(a_sym, b_sym, a_count, b_count)
+                    u_clauses = _u_clauses(repository, alpha, beta)
+                    if u_clauses:
+                        return alpha, beta, rng.choice(u_clauses)
+    finally:
+        count('swappable_pair_of_literals.examined_pairs', examined)
+    return None
+
 
-        v_alpha_non_beta_single = v_alpha_non_beta.pop()
-        u_clause_idx = v_alpha.index(v_alpha_non_beta_single)
-        u_clause = v_clauses_alpha[u_clause_idx]
-
-        yield alpha, beta, u_clause
-
-
-def non_trivial_non_isomorphic_cnf_generator(original_cnf: CNF, isomorphic_to_result=True, **kwargs) -> CNF:
-    """Return a new cnf generated by using the paper algorithm."""
-    cardinalities = CardinalityRepository(original_cnf)
-    for alpha, beta, u_clause in _swappable_pair_of_literals(original_cnf, cardinalities):
-        alpha_count = cardinalities.literal_count(alpha)
-        beta_count = cardinalities.literal_count(beta)
-        delta = alpha_count - beta_count
-
-        c_alpha = set(original_cnf.filtered_clauses_by_literals(included={alpha}, excluded={beta}))
-        to_change: List[Clause] = list(c_alpha - {u_clause})[:delta]
-        changed = set()
-        for clause in to_change:
-            literals = set(clause.literals)
-            literals.remove(alpha)
-            literals.add(beta)
-            changed.add(Clause(literals))
-        cnf = CNF((original_cnf.clauses - set(to_change)) | changed)
-
-        if isomorphic_to_result:
-            return cnf_isomorphic_generator(cnf, **kwargs)  # we return an isomorphic cnf to obfuscate the changes
-        return cnf
-    raise GenerationFailedException
+def _apply_swap(cnf: CNF, repository: CardinalityRepository, candidate: SwapCandidate) -> CNF:
+    """Return the cnf non isomorph to cnf obtained swapping the literals of the candidate."""
+    alpha, beta, u_clause = candidate
+    delta = repository.literal_count(alpha) - repository.literal_count(beta)
+
+    c_alpha = repository.exclusive_clauses(alpha, beta)
+    to_change: List[Clause] = sorted(c_alpha - {u_clause}, key=clause_sort_key)[:delta]
+    changed = set()
+    for clause in to_change:
+        literals = set(clause.literals)
+        literals.remove(alpha)
+        literals.add(beta)
+        changed.add(Clause(literals))
+    return DeltaCNF(cnf, added=changed, removed=to_change)
+
+
+class SwapAnalysis:
+    """Represent all the swap candidates (alpha, beta, u clause) of a cnf, found once and reused."""
+
+    def __init__(self, cnf: CNF):
+        """Find all the candidates of the cnf."""
+        self.cnf = cnf
+        self.cardinalities = CardinalityRepository(cnf)
+        self.candidates: List[SwapCandidate] = list(_swappable_pair_of_literals(cnf, self.cardinalities))
+
+    def apply(self, candidate: SwapCandidate) -> CNF:
+        """Return the cnf non isomorph to the analysed one obtained swapping the literals of the candidate."""
+        return _apply_swap(self.cnf, self.cardinalities, candidate)
+
+
+def cached_swap_analysis(cnf: CNF) -> Optional[SwapAnalysis]:
+    """Return the swap analysis of the cnf if it is in the cache, else None."""
+    with _swap_analyses_lock:
+        analysis = _swap_analyses.get(cnf)
+        if analysis is not None:
+            _swap_analyses.move_to_end(cnf)
+        return analysis
+
+
+def swap_analysis(cnf: CNF) -> SwapAnalysis:
+    """Return the swap analysis of the cnf, cached for the SWAP_ANALYSIS_CACHE_SIZE most recently analysed cnfs."""
+    analysis = cached_swap_analysis(cnf)
+    if analysis is None:
+        analysis = SwapAnalysis(cnf)
+        with _swap_analyses_lock:
+            _swap_analyses[cnf] = analysis
+            if len(_swap_analyses) > SWAP_ANALYSIS_CACHE_SIZE:
+                _swap_analyses.popitem(last=False)
+    return analysis
+
+
+@instrumented
+def non_trivial_non_isomorphic_cnf_generator(
+    original_cnf: CNF,
+    isomorphic_to_result=True,
+    rng: Optional[Random] = None,
+    **kwargs,
+) -> CNF:
+    """Return a new cnf generated by using the paper algorithm, swapping the literals of a random candidate.
+
+    Random pairs of literals are tried until one can be swapped, without listing all the candidates. The
+    cardinalities of a cnf already analysed are reused, but the candidate is drawn in the same way, so that the
+    result depends only on the cnf and on the random generator.
+    """
+    rng = global_rng() if rng is None else rng
+    analysis = cached_swap_analysis(original_cnf)
+    cardinalities = CardinalityRepository(original_cnf) if analysis is None else analysis.cardinalities
+    candidate = _random_swap_candidate(cardinalities, rng)
+    if candidate is None:
+        raise GenerationFailedException
+    cnf = _apply_swap(original_cnf, cardinalities, candidate)
+
+    if isomorphic_to_result:
+        return cnf_isomorphic_generator(cnf, rng=rng, **kwargs)  # we return an isomorphic cnf to obfuscate the changes
+    return cnf
+
+
+@instrumented
+def non_trivial_non_isomorphic_variants(
+    original_cnf: CNF,
+    how_many: int,
+    isomorphic_to_result=True,
+    rng: Optional[Random] = None,
+    **kwargs,
+) -> List[CNF]:
+    """Return how_many distinct cnfs generated by using the paper algorithm, analysing the original cnf once.
+
+    Candidates are tried in a random order, raising an exception if they give fewer distinct cnfs.
+    """
+    rng = global_rng() if rng is None else rng
+    analysis = swap_analysis(original_cnf)
+    order = list(range(len(analysis.candidates)))
+    rng.shuffle(order)
+    variants: List[CNF] = []
+    seen: Set[CNF] = set()
+    for idx in order:
+        if len(variants) == how_many:
+            break
+        cnf = analysis.apply(analysis.candidates[idx])
+        if cnf in seen:
+            continue
+        seen.add(cnf)
+        variants.append(cnf_isomorphic_generator(cnf, rng=rng, **kwargs) if isomorphic_to_result else cnf)
+    if len(variants) < how_many:
+        raise GenerationFailedException(f'Only {len(variants)} distinct non isomorphic variants found.')
+    return variants
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""Compact integer-array representation of cnf formulas."""
+
+from dataclasses import dataclass
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+from .cnf import CNF
+from .cnf import Clause
+from .cnf import Literal
+from .exceptions import MalformedCNFException
+
+LITERAL_DTYPE = np.int32
+OFFSET_DTYPE = np.int64
+
+
+def _signed_index(literal: Literal, symbols_index: Dict[str, int]) -> int:
+    """Return the DIMACS-style integer of a literal."""
+    if literal.is_negated:
+        return -symbols_index[literal.symbol]
+    return symbols_index[literal.symbol]
+
+
+@dataclass(frozen=True, eq=False)
+class PackedCNF:
+    """Represent a cnf formula as DIMACS-style signed integers in a flat buffer.
+
+    The literals of clause ``i`` are ``literals[offsets[i]:offsets[i + 1]]``: the absolute value of
+    each literal is the 1-based index of its symbol in ``symbols``, the sign is negative for negated literals.
+    """
+
+    literals: np.ndarray
+    offsets: np.ndarray
+    symbols: Tuple[str, ...]
+
+    def __init__(self, literals: np.ndarray, offsets: np.ndarray, symbols: Sequence[str]):
+        """Save the buffers checking that they are consistent."""
+        literals = np.ascontiguousarray(literals, dtype=LITERAL_DTYPE)
+        offsets = np.ascontiguousarray(offsets, dtype=OFFSET_DTYPE)
+        if offsets.ndim != 1 or offsets.size == 0 or offsets[0] != 0 or offsets[-1] != literals.size:
+            raise MalformedCNFException('Clause offsets do not match the literals buffer.')
+        if literals.size and (np.any(literals == 0) or np.abs(literals).max() > len(symbols)):
+            raise MalformedCNFException('Literal outside of the symbol table.')
+        object.__setattr__(self, 'literals', literals)  # noqa: WPS609
+        object.__setattr__(self, 'offsets', offsets)  # noqa: WPS609
+        object.__setattr__(self, 'symbols', tuple(symbols))  # noqa: WPS609
+
+    @classmethod
+    def from_clauses(cls, clauses: Iterable[Sequence[int]], symbols: Sequence[str]) -> 'PackedCNF':
+        """Build the packed cnf from clauses given as sequences of signed symbol indexes."""
+        lengths = [0]
+        buffer: List[int] = []
+        for clause in clauses:
+            buffer.extend(clause)
+            lengths.append(len(clause))
+        return cls(np.array(buffer, dtype=LITERAL_DTYPE), np.cumsum(lengths, dtype=OFFSET_DTYPE), symbols)
+
+    @classmethod
+    def from_cnf(cls, cnf: CNF, symbols: Optional[Sequence[str]] = None) -> 'PackedCNF':
+        """Pack a cnf, using the given symbol table or the sorted symbols of the cnf."""
+        if symbols is None:
+            symbols = sorted({literal.symbol for literal in cnf.literals})
+        symbols_index: Dict[str, int] = {symbol: idx for idx, symbol in enumerate(symbols, start=1)}
+        try:
+            return cls.from_clauses(
+                ([_signed_index(lit, symbols_index) for lit in clause.literals] for clause in cnf.clauses),
+                symbols,
+            )
+        except KeyError as error:
+            raise MalformedCNFException(f'Symbol {error} not in the symbol table.') from error
+
+    @property
+    def num_clauses(self) -> int:
+        """Return the number of clauses."""
+        return self.offsets.size - 1
+
+    @property
+    def num_symbols(self) -> int:
+        """Return the size of the symbol table."""
+        return len(self.symbols)
+
+    @property
+    def clause_lengths(self) -> np.ndarray:
+        """Return the number of literals of every clause."""
+        return np.diff(self.offsets)
+
+    @property
+    def clause_ids(self) -> np.ndarray:
+        """Return, for every literal in the buffer, the index of its clause."""
+        return np.repeat(np.arange(self.num_clauses), self.clause_lengths)
+
+    def clause(self, idx: int) -> np.ndarray:
+        """Return a view over the literals of a clause."""
+        return self.literals[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def clauses(self) -> Iterator[np.ndarray]:
+        """Iterate through views over the literals of every clause."""
+        yield from (self.clause(idx) for idx in range(self.num_clauses))
+
+    def to_cnf(self) -> CNF:
+        """Return the equivalent cnf object."""
+        positives = [Literal(symbol) for symbol in self.symbols]
+        negatives = [Literal(symbol, is_negated=True) for symbol in self.symbols]
+        all_literals = self.literals.tolist()
+        clauses = set()
+        for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            clauses.add(Clause({
+                negatives[-lit - 1] if lit < 0 else positives[lit - 1]
+                for lit in all_literals[start:end]
+            }))
+        return CNF(clauses)
+
+    def __len__(self) -> int:
+        """Return the number of clauses."""
+        return self.num_clauses
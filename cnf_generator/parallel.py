@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""Helpers to fan generation out over a process pool."""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from typing import Callable
+from typing import Deque
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TypeVar
+
+ChunkType = TypeVar('ChunkType')
+ResultType = TypeVar('ResultType')
+
+PENDING_CHUNKS_PER_WORKER = 4
+
+
+def _pop_completed(pending: Deque[Future], ordered: bool) -> Iterator[ResultType]:
+    """Remove and iterate through the results of the first completed tasks."""
+    if ordered:
+        yield from pending.popleft().result()
+        return
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    for future in done:  # noqa: WPS440
+        yield from future.result()
+
+
+def imap_chunks(
+    func: Callable[[ChunkType], List[ResultType]],
+    chunks: Iterable[ChunkType],
+    *,
+    workers: int,
+    ordered: bool = True,
+    max_pending: Optional[int] = None,
+) -> Iterator[ResultType]:
+    """Iterate through the results of func over the chunks, computed in a process pool.
+
+    At most ``max_pending`` chunks are submitted and not yet consumed, so the memory stays bounded
+    however many chunks there are. With ``ordered`` the results follow the order of the chunks,
+    otherwise the results of every chunk are returned as soon as it completes.
+    """
+    max_pending = max_pending or workers * PENDING_CHUNKS_PER_WORKER
+    pending: Deque[Future] = deque()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= max_pending:
+                yield from _pop_completed(pending, ordered)
+        while pending:
+            yield from _pop_completed(pending, ordered)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
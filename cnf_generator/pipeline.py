@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""Background prefetching of generated cnfs and pairs, with backpressure."""
+
+import asyncio
+from contextvars import copy_context
+from queue import Empty
+from queue import Full
+from queue import Queue
+from threading import Event
+from threading import Thread
+from typing import Generic
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TypeVar
+
+from .random_generators import random_cnfs
+from .random_generators import random_pairs
+
+ItemType = TypeVar('ItemType')
+
+DEFAULT_PREFETCH = 64
+POLL_INTERVAL = 0.1
+
+_END = object()
+
+
+class _Failure:
+    """Wrap an exception raised by the producer, to raise it again in the consumer."""
+
+    def __init__(self, error: BaseException):
+        """Save the exception."""
+        self.error = error
+
+
+class PrefetchingPipeline(Generic[ItemType]):
+    """Produce the items of an iterable in a background thread, ahead of the consumer.
+
+    At most ``prefetch`` items wait in a bounded queue, so the producer blocks when the consumer is slower.
+    Items can be consumed with a for loop or with an async for loop. Exceptions of the producer (like
+    ``GenerationFailedException``) are raised again in the consumer, after the items produced before them.
+    ``close`` (or leaving the with block) stops the producer and closes the iterable.
+    """
+
+    def __init__(self, iterable: Iterable[ItemType], prefetch: int = DEFAULT_PREFETCH):
+        """Start producing the items."""
+        self._queue: Queue = Queue(maxsize=prefetch)
+        self._stop = Event()
+        self._done = False
+        self._pending: Optional[asyncio.Future] = None
+        # the producer runs in a copy of the current context, to record in the statistics being collected
+        self._thread = Thread(target=copy_context().run, args=(self._produce, iter(iterable)), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:  # noqa: WPS110
+        """Put the item in the queue waiting for space, returning False if the pipeline was closed meanwhile."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=POLL_INTERVAL)
+            except Full:
+                continue
+            return True
+        return False
+
+    def _produce(self, iterator: Iterator[ItemType]):
+        """Put all the items in the queue, then the end marker or the exception raised."""
+        try:
+            for item in iterator:  # noqa: WPS110
+                if not self._put(item):
+                    break
+            else:
+                self._put(_END)
+        except BaseException as error:  # noqa: B902
+            self._put(_Failure(error))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    def _get(self):
+        """Take the next item from the queue, waiting for it, or the end marker if the pipeline is closed meanwhile."""
+        while not self._stop.is_set():
+            try:
+                return self._queue.get(timeout=POLL_INTERVAL)
+            except Empty:
+                continue
+        return _END
+
+    def _next(self, item) -> ItemType:  # noqa: WPS110
+        """Return the item taken from the queue, raising the end of iteration or the exception of the producer."""
+        if item is _END:
+            self._done = True
+            raise StopIteration
+        if isinstance(item, _Failure):
+            self._done = True
+            raise item.error
+        return item
+
+    def __iter__(self) -> Iterator[ItemType]:
+        """Return the pipeline itself."""
+        return self
+
+    def __next__(self) -> ItemType:
+        """Return the next item, waiting for it if not ready."""
+        if self._done:
+            raise StopIteration
+        return self._next(self._get())
+
+    def __aiter__(self) -> 'PrefetchingPipeline[ItemType]':
+        """Return the pipeline itself."""
+        return self
+
+    async def __anext__(self) -> ItemType:
+        """Return the next item, waiting for it in an executor so that the event loop is not blocked.
+
+        If the waiting task is cancelled the item is not lost: the next call returns it.
+        """
+        if self._done:
+            raise StopAsyncIteration
+        if self._pending is None:
+            self._pending = asyncio.get_running_loop().run_in_executor(None, self._get)
+        item = await asyncio.shield(self._pending)  # noqa: WPS110
+        self._pending = None
+        try:
+            return self._next(item)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop the producer, discarding the items not consumed."""
+        self._done = True
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._queue.get_nowait()
+            except Empty:
+                self._thread.join(POLL_INTERVAL if timeout is None else timeout)
+                if timeout is not None:
+                    break
+        try:
+            self._queue.put_nowait(_END)  # wakes up the consumers still waiting
+        except Full:
+            pass  # noqa: WPS420
+
+    def __enter__(self) -> 'PrefetchingPipeline[ItemType]':
+        """Return the pipeline itself."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the producer."""
+        self.close()
+
+
+def prefetched_pairs(how_many_pairs: int, prefetch: int = DEFAULT_PREFETCH, **kwargs) -> PrefetchingPipeline:
+    """Return a pipeline producing ``random_pairs(how_many_pairs, **kwargs)`` in background.
+
+    With ``workers`` the pairs are generated in a process pool, otherwise in the background thread.
+    """
+    return PrefetchingPipeline(random_pairs(how_many_pairs, **kwargs), prefetch)
+
+
+def prefetched_cnfs(how_many_cnf: int, prefetch: int = DEFAULT_PREFETCH, **kwargs) -> PrefetchingPipeline:
+    """Return a pipeline producing ``random_cnfs(how_many_cnf, **kwargs)`` in background."""
+    return PrefetchingPipeline(random_cnfs(how_many_cnf, **kwargs), prefetch)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""Structural statistics of formulas, to measure and control how hard they are."""
+
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+import numpy as np
+
+from .cnf import CNF
+from .non_iso_gen_paper import SwapAnalysis
+from .non_iso_gen_paper import cached_swap_analysis
+from .packed import OFFSET_DTYPE
+from .packed import PackedCNF
+
+
+@dataclass
+class FormulaProfile:
+    """Represent the structural statistics of a formula.
+
+    Occurrences are given for every symbol of the symbol table (in its order), the width histogram has
+    the number of clauses of width ``w`` at index ``w``. The swap counts are the candidates of the paper
+    algorithm (see ``swap_analysis``), None if not computed.
+    """
+
+    positive_occurrences: np.ndarray
+    negative_occurrences: np.ndarray
+    width_histogram: np.ndarray
+    swappable_pairs: Optional[int] = None
+    swap_candidates: Optional[int] = None
+
+    @property
+    def occurrences(self) -> np.ndarray:
+        """Return the occurrences of every symbol, positive or negated."""
+        return self.positive_occurrences + self.negative_occurrences
+
+    @property
+    def num_symbols(self) -> int:
+        """Return the number of symbols occurring in the formula."""
+        return int(np.count_nonzero(self.occurrences))
+
+    @property
+    def num_clauses(self) -> int:
+        """Return the number of clauses."""
+        return int(self.width_histogram.sum())
+
+    @property
+    def clause_variable_ratio(self) -> float:
+        """Return the number of clauses for every symbol."""
+        return self.num_clauses / self.num_symbols if self.num_symbols else 0
+
+    @property
+    def occurrence_histogram(self) -> np.ndarray:
+        """Return, at index ``k``, the number of symbols occurring ``k`` times."""
+        occurrences = self.occurrences
+        return np.bincount(occurrences[occurrences > 0])
+
+    @property
+    def negated_fraction(self) -> float:
+        """Return the fraction of negated literal occurrences."""
+        total = int(self.occurrences.sum())
+        return int(self.negative_occurrences.sum()) / total if total else 0
+
+    def as_dict(self) -> Dict:
+        """Return the summary statistics as a dictionary of plain values."""
+        occurrences = self.occurrences[self.occurrences > 0]
+        return {
+            'num_symbols': self.num_symbols,
+            'num_clauses': self.num_clauses,
+            'clause_variable_ratio': self.clause_variable_ratio,
+            'width_histogram': self.width_histogram.tolist(),
+            'occurrence_histogram': self.occurrence_histogram.tolist(),
+            'mean_occurrences': float(occurrences.mean()) if occurrences.size else 0,
+            'max_occurrences': int(occurrences.max(initial=0)),
+            'negated_fraction': self.negated_fraction,
+            'swappable_pairs': self.swappable_pairs,
+            'swap_candidates': self.swap_candidates,
+        }
+
+
+def packed_profiles(formulas: Sequence[PackedCNF]) -> List[FormulaProfile]:  # noqa: WPS210
+    """Return the profiles (without swap counts) of many packed cnfs in one vectorized pass."""
+    if not formulas:
+        return []
+    num_symbols = np.array([formula.num_symbols for formula in formulas], dtype=OFFSET_DTYPE)
+    num_clauses = np.array([formula.num_clauses for formula in formulas], dtype=OFFSET_DTYPE)
+    num_literals = np.array([formula.literals.size for formula in formulas], dtype=OFFSET_DTYPE)
+    symbol_offsets = np.concatenate(([0], np.cumsum(num_symbols)))
+    literals = np.concatenate([formula.literals for formula in formulas])
+    widths = np.concatenate([formula.clause_lengths for formula in formulas])
+
+    # symbols of all the formulas are numbered together, from the offset of their formula
+    symbols = np.repeat(symbol_offsets[:-1], num_literals) + np.abs(literals) - 1
+    total_symbols = int(symbol_offsets[-1])
+    positive = np.bincount(symbols[literals > 0], minlength=total_symbols)
+    negative = np.bincount(symbols[literals < 0], minlength=total_symbols)
+
+    histogram_size = int(widths.max(initial=0)) + 1
+    clause_formulas = np.repeat(np.arange(len(formulas)), num_clauses)
+    histograms = np.bincount(
+        clause_formulas * histogram_size + widths, minlength=len(formulas) * histogram_size,
+    ).reshape(len(formulas), histogram_size)
+
+    return [
+        FormulaProfile(
+            positive_occurrences=positive[start:end],
+            negative_occurrences=negative[start:end],
+            width_histogram=histograms[formula],
+        )
+        for formula, (start, end) in enumerate(zip(symbol_offsets[:-1].tolist(), symbol_offsets[1:].tolist()))
+    ]
+
+
+def formula_profile(cnf: Union[CNF, PackedCNF], swaps: bool = True) -> FormulaProfile:
+    """Return the profile of a cnf, with the swap counts of the paper algorithm if requested.
+
+    The swap analysis is taken from the cache of ``swap_analysis`` if there, but it is not added to it, so
+    profiling does not evict the analyses of the generators.
+    """
+    packed = cnf if isinstance(cnf, PackedCNF) else PackedCNF.from_cnf(cnf)
+    profile = packed_profiles([packed])[0]
+    if swaps:
+        swap_cnf = packed.to_cnf() if isinstance(cnf, PackedCNF) else cnf
+        analysis = cached_swap_analysis(swap_cnf) or SwapAnalysis(swap_cnf)
+        candidates = analysis.candidates
+        profile.swappable_pairs = len({(alpha, beta) for alpha, beta, _ in candidates})
+        profile.swap_candidates = len(candidates)
+    return profile
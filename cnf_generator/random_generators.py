@@ -2,30 +2,67 @@
 
 """Random generators for cnf pairs."""
 
-from random import choice
-from random import randint
+from functools import partial
+from hashlib import blake2b
+from random import Random
 from random import seed
-from random import shuffle
+from typing import Any
+from typing import Dict
 from typing import Iterator
 from typing import List
+from typing import Mapping
 from typing import Optional
+from typing import Sequence
 from typing import Set
 from typing import Tuple
 
-from numpy.random import choice as np_choice
-
 from .cnf import CNF
 from .cnf import STD_SYMBOLS
 from .cnf import Clause
-from .cnf import Literal
 from .iso_gen import cnf_isomorphic_generator
 from .non_iso_gen import cnf_generator_trivial
 from .non_iso_gen_paper import non_trivial_non_isomorphic_cnf_generator
+from .sampling import global_rng
+from .sampling import literal_from_code
+from .sampling import sample_distinct_clauses
+from .sampling import sample_weighted_clauses
+from .sampling import sample_widths
+from .sampling import target_widths
+from .stats import GenerationStats
+from .stats import collecting_stats
+from .stats import count
+from .stats import current_stats
+from .stats import instrumented
+from .symbols import sample_symbols
+
+PAIR_GENERATORS = (
+    cnf_isomorphic_generator,
+    cnf_generator_trivial,
+    non_trivial_non_isomorphic_cnf_generator,
+)
+
+
+def _literal_weights(
+    num_symbols: int,
+    occurrence_exponent: float,
+    negation_probability: float,
+    monotone: bool,
+) -> List[float]:
+    """Return the weight of every literal code, from the power law of the symbols and the negation probability."""
+    symbol_weights = [(idx + 1) ** -occurrence_exponent for idx in range(num_symbols)]
+    if monotone:
+        return symbol_weights
+    return [
+        weight * probability
+        for weight in symbol_weights
+        for probability in (1 - negation_probability, negation_probability)
+    ]
 
 
+@instrumented
 def random_cnf(  # noqa: WPS211
     *,
-    symbols: List[str] = None,
+    symbols: Optional[Sequence[str]] = None,
     min_num_symbols: int = 25,
     max_num_symbols: int = 50,
     min_num_clauses: int = 20,
@@ -34,39 +71,53 @@ def random_cnf(  # noqa: WPS211
     all_clauses_same_dimension: bool = True,
     monotone: bool = False,
     random_seed: Optional[int] = None,
+    rng: Optional[Random] = None,
+    clause_variable_ratio: Optional[float] = None,
+    width_distribution: Optional[Mapping[int, float]] = None,
+    occurrence_exponent: float = 0,
+    negation_probability: float = 0.5,
     **kwagrs,
 ) -> CNF:
-    """Generate a random cnf based on some parameters."""
-    symbols = symbols or list(STD_SYMBOLS)
-    symbols = symbols[:]
-
-    if random_seed is not None:
-        seed(random_seed)
-
-    num_symbols = randint(min_num_symbols, max_num_symbols)
-    shuffle(symbols)
-    symbols = symbols[:num_symbols]
-
-    num_clauses = randint(min_num_clauses, max_num_clauses)
-    clauses: Set[Clause] = set()
-    while len(clauses) < num_clauses:
-        this_clause_len = avg_literals_per_clause
-        if not all_clauses_same_dimension:
-            this_clause_len = randint(1, (avg_literals_per_clause * 2) - 1)
-
-        this_clause_literals: Set[Literal] = set()
-        while len(this_clause_literals) < this_clause_len:
-            symbol = choice(symbols)
-            is_negated = False
-            if not monotone:
-                is_negated = bool(randint(0, 1))
-
-            literal = Literal(symbol, is_negated)
-
-            this_clause_literals.add(literal)
-
-        clause = Clause(this_clause_literals)
-        clauses.add(clause)
+    """Generate a random cnf based on some parameters.
+
+    Random choices are made with rng if given, otherwise with the generator of the random module
+    (seeded with random_seed if given). The optional targets set the number of clauses from the symbols
+    (clause_variable_ratio), the fraction of clauses of every width (width_distribution) and the occurrences
+    of the literals: the i-th symbol is drawn with weight (i + 1) ** -occurrence_exponent, negated with
+    negation_probability.
+    """
+    symbols = symbols or sorted(STD_SYMBOLS)
+
+    if rng is None:
+        if random_seed is not None:
+            seed(random_seed)
+        rng = global_rng()
+
+    num_symbols = rng.randint(min_num_symbols, max_num_symbols)
+    symbols = sample_symbols(rng, symbols, num_symbols)
+
+    if clause_variable_ratio is None:
+        num_clauses = rng.randint(min_num_clauses, max_num_clauses)
+    else:
+        num_clauses = max(1, round(clause_variable_ratio * len(symbols)))
+    num_literals = len(symbols) if monotone else len(symbols) * 2
+    allowed_widths = [avg_literals_per_clause]
+    if not all_clauses_same_dimension:
+        allowed_widths = list(range(1, avg_literals_per_clause * 2))
+
+    if width_distribution is None:
+        widths = sample_widths(rng, num_clauses, allowed_widths, num_literals)
+    else:
+        widths = target_widths(num_clauses, width_distribution, num_literals)
+    if occurrence_exponent or (negation_probability != 0.5 and not monotone):
+        weights = _literal_weights(len(symbols), occurrence_exponent, negation_probability, monotone)
+        all_codes = sample_weighted_clauses(rng, weights, widths)
+    else:
+        all_codes = sample_distinct_clauses(rng, num_literals, widths)
+    clauses: Set[Clause] = {
+        Clause({literal_from_code(symbols, code, monotone) for code in codes})
+        for codes in all_codes
+    }
 
     return CNF(clauses)
 
@@ -76,35 +127,94 @@ def random_cnfs(how_many_cnf: int, **kwargs) -> Iterator[CNF]:
     yield from (random_cnf(**kwargs) for _ in range(how_many_cnf))
 
 
-def random_pairs(
-    how_many_pairs,
+def _pair_seed(master_seed: int, index: int) -> int:
+    """Return the seed of the pair at index, derived from the master seed."""
+    return int.from_bytes(blake2b(f'{master_seed}:{index}'.encode(), digest_size=8).digest(), 'little')
+
+
+def _random_pair(
+    index: int,
+    *,
+    master_seed: int,
+    funcs_probs: Sequence[float],
+    cnf_kwargs: Dict[str, Any],
+) -> Tuple[CNF, CNF, int]:
+    """Return the pair at index, generated with a local random generator seeded from master seed and index."""
+    rng = Random(_pair_seed(master_seed, index))
+    original_cnf = random_cnf(rng=rng, **cnf_kwargs)
+    func_idx = rng.choices(range(len(PAIR_GENERATORS)), weights=funcs_probs)[0]
+    new_cnf = PAIR_GENERATORS[func_idx](original_cnf, rng=rng, **cnf_kwargs)
+    count(f'random_pairs.pair_type_{func_idx}')
+    return original_cnf, new_cnf, func_idx
+
+
+def _seeded_random_pairs(indexes: range, **kwargs) -> List[Tuple[CNF, CNF, int]]:
+    """Return the pairs at the indexes, each one generated from its own seed."""
+    return [_random_pair(index, **kwargs) for index in indexes]
+
+
+def _seeded_random_pairs_with_stats(
+    indexes: range, **kwargs,
+) -> List[Tuple[List[Tuple[CNF, CNF, int]], GenerationStats]]:
+    """Return the pairs at the indexes with the statistics of their generation, as a single result of the chunk."""
+    with collecting_stats() as stats:
+        pairs = _seeded_random_pairs(indexes, **kwargs)
+    return [(pairs, stats)]
+
+
+def random_pairs(  # noqa: WPS211
+    how_many_pairs: Optional[int] = None,
     *,
     isomorph_probability=0.5,
     non_isomoprh_trivial_probability=0.25,
     non_isomoprh_non_trivial_probability=0.25,
+    start: int = 0,
+    stop: Optional[int] = None,
+    workers: Optional[int] = None,
+    ordered: bool = True,
+    chunk_size: int = 16,
     **kwargs,
 ) -> Iterator[Tuple[CNF, CNF, int]]:
-    """Iterate through pairs of cnfs generated based on the probabilities."""
+    """Iterate through pairs of cnfs generated based on the probabilities.
+
+    Every pair is generated from its own seed, derived from ``random_seed`` (used as master seed, drawn from
+    the random module if not given) and the index of the pair, so the pairs with indexes from ``start`` to
+    ``stop`` (by default ``how_many_pairs``) are the same of a whole run, whatever the number of workers.
+    With more than one worker the pairs are generated in a process pool, in chunks of ``chunk_size``
+    pairs, and ``ordered=False`` returns every chunk as soon as it is ready.
+    """
     # normalize probabilities
     tot_probs = isomorph_probability + non_isomoprh_trivial_probability + non_isomoprh_non_trivial_probability
     isomorph_probability /= tot_probs
     non_isomoprh_trivial_probability /= tot_probs
     non_isomoprh_non_trivial_probability /= tot_probs
 
-    funcs = [
-        cnf_isomorphic_generator,
-        cnf_generator_trivial,
-        non_trivial_non_isomorphic_cnf_generator,
-    ]
     funcs_probs = [
         isomorph_probability,
         non_isomoprh_trivial_probability,
         non_isomoprh_non_trivial_probability,
     ]
 
-    for _ in range(how_many_pairs):
-        original_cnf = random_cnf(**kwargs)
-        func_idx = np_choice(3, p=funcs_probs)
-        func_generator = funcs[func_idx]
-        new_cnf = func_generator(original_cnf, **kwargs)
-        yield original_cnf, new_cnf, func_idx
+    stop = how_many_pairs if stop is None else stop
+    if stop is None:
+        raise TypeError('random_pairs() needs how_many_pairs or stop.')
+    master_seed = kwargs.pop('random_seed', None)
+    if master_seed is None:
+        master_seed = global_rng().getrandbits(64)
+    chunk_kwargs = {'master_seed': master_seed, 'funcs_probs': funcs_probs, 'cnf_kwargs': kwargs}
+    chunks = (range(chunk_start, min(chunk_start + chunk_size, stop)) for chunk_start in range(start, stop, chunk_size))
+    if workers is None or workers <= 1:
+        for chunk in chunks:
+            yield from _seeded_random_pairs(chunk, **chunk_kwargs)
+        return
+    # imported here so that the process pool machinery is loaded only when used
+    from .parallel import imap_chunks  # noqa: WPS433
+    stats = current_stats()
+    if stats is None:
+        yield from imap_chunks(partial(_seeded_random_pairs, **chunk_kwargs), chunks, workers=workers, ordered=ordered)
+        return
+    # the statistics of the workers are collected for every chunk and merged in the ones of the caller
+    generate_chunk = partial(_seeded_random_pairs_with_stats, **chunk_kwargs)
+    for pairs, chunk_stats in imap_chunks(generate_chunk, chunks, workers=workers, ordered=ordered):
+        stats.merge(chunk_stats)
+        yield from pairs
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""Bounded-time sampling of distinct clauses without rejection loops."""
+
+import random
+from collections import Counter
+from collections import defaultdict
+from itertools import accumulate
+from math import comb
+from random import Random
+from typing import Collection
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+
+from .cnf import Literal
+from .exceptions import GenerationFailedException
+from .stats import count
+
+MAX_WEIGHTED_DRAWS_FACTOR = 32
+
+
+def global_rng() -> Random:
+    """Return the random generator behind the functions of the random module."""
+    return random._inst  # noqa: WPS437
+
+
+def combination_rank(combination: Iterable[int]) -> int:
+    """Return the rank of a combination of distinct non negative integers in colexicographic order."""
+    return sum(comb(element, position) for position, element in enumerate(sorted(combination), start=1))
+
+
+def combination_unrank(rank: int, space: int, width: int) -> Tuple[int, ...]:
+    """Return the combination of width elements of range(space) with the rank in colexicographic order."""
+    combination = []
+    for position in range(width, 0, -1):
+        # the largest element such that comb(element, position) <= rank
+        low, high = position - 1, space - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if comb(middle, position) <= rank:
+                low = middle
+            else:
+                high = middle - 1
+        combination.append(low)
+        rank -= comb(low, position)
+        space = low
+    return tuple(reversed(combination))
+
+
+def sample_distinct_ranks(rng: Random, total: int, how_many: int, excluded: Collection[int] = ()) -> List[int]:
+    """Return how_many distinct integers of range(total) not in excluded.
+
+    It is a sparse Fisher-Yates shuffle over the virtual sequence range(total), so it takes at most
+    how_many + len(excluded) draws and memory, however big total is.
+    """
+    if total - len(excluded) < how_many:
+        raise GenerationFailedException(f'Only {total - len(excluded)} values available, {how_many} requested.')
+    swaps: Dict[int, int] = {}
+    ranks: List[int] = []
+    position = 0
+    while len(ranks) < how_many:
+        other = rng.randrange(position, total)
+        value = swaps.get(other, other)
+        swaps[other] = swaps.get(position, position)
+        position += 1
+        if value not in excluded:
+            ranks.append(value)
+    count('sampling.draws', position)
+    count('sampling.rejections', position - how_many)
+    return ranks
+
+
+def sample_widths(
+    rng: Random,
+    how_many: int,
+    widths: Sequence[int],
+    num_literals: int,
+    excluded: Optional[Dict[int, int]] = None,
+) -> Dict[int, int]:
+    """Return how many clauses to draw for every width, as if drawing clauses one by one and rejecting repeated ones.
+
+    Every clause draws a width from widths (uniformly or as often as it appears) and then a clause of that width
+    uniformly, and a clause already drawn is rejected and drawn again with a new width, as ``random_packed_cnfs``
+    does: so every width is drawn with a weight proportional to the fraction of its clauses still available, and
+    widths with few clauses are drawn less as they fill up. The available clauses of a width are the ones of
+    num_literals literals minus the excluded ones, so the result never requires more clauses than exist.
+    """
+    excluded = excluded or {}
+    capacities = {width: comb(num_literals, width) - excluded.get(width, 0) for width in set(widths)}
+    if sum(capacities.values()) < how_many:
+        raise GenerationFailedException(f'Not enough distinct clauses of {num_literals} literals.')
+    counts: Dict[int, int] = Counter()
+    available = [width for width in widths if capacities[width] > 0]
+    for _ in range(how_many):
+        weights = [(capacities[width] - counts[width]) / capacities[width] for width in available]
+        counts[rng.choices(available, weights)[0]] += 1
+    return counts
+
+
+def literal_from_code(symbols: Sequence[str], code: int, monotone: bool) -> Literal:
+    """Return the literal of a code: the symbol index if monotone, else doubled with the negation in the lowest bit."""
+    if monotone:
+        return Literal(symbols[code])
+    return Literal(symbols[code >> 1], is_negated=bool(code & 1))
+
+
+def sample_distinct_clauses(
+    rng: Random,
+    num_literals: int,
+    widths: Dict[int, int],
+    excluded: Iterable[Collection[int]] = (),
+) -> List[Tuple[int, ...]]:
+    """Return distinct clauses, as sorted codes of range(num_literals), with the number of clauses for every width.
+
+    The clauses in excluded (as collections of codes) are never returned.
+    """
+    excluded_ranks: Dict[int, Set[int]] = defaultdict(set)
+    for clause in excluded:
+        excluded_ranks[len(clause)].add(combination_rank(clause))
+    clauses: List[Tuple[int, ...]] = []
+    for width, how_many in sorted(widths.items()):
+        if width > num_literals:
+            raise GenerationFailedException(f'No clause of {width} literals out of {num_literals}.')
+        ranks = sample_distinct_ranks(rng, comb(num_literals, width), how_many, excluded_ranks[width])
+        clauses.extend(combination_unrank(rank, num_literals, width) for rank in ranks)
+    return clauses
+
+
+def target_widths(how_many: int, distribution: Mapping[int, float], num_literals: int) -> Dict[int, int]:
+    """Return how many clauses of every width, in the proportions of the distribution as closely as possible.
+
+    Counts are rounded with the largest remainders, and the clauses a width cannot have (all its clauses
+    of num_literals literals being used) are moved to the other widths in proportion.
+    """
+    capacities = {width: comb(num_literals, width) for width, weight in distribution.items() if weight > 0}
+    if sum(capacities.values()) < how_many:
+        raise GenerationFailedException(f'Not enough distinct clauses of {num_literals} literals.')
+    counts: Dict[int, int] = Counter()
+    remaining = how_many
+    while remaining:
+        available = [width for width in capacities if counts[width] < capacities[width]]
+        total_weight = sum(distribution[width] for width in available)
+        shares = {width: remaining * distribution[width] / total_weight for width in available}
+        added = {width: int(share) for width, share in shares.items()}
+        by_remainder = sorted(available, key=lambda width: shares[width] - added[width], reverse=True)
+        for width in by_remainder[:remaining - sum(added.values())]:
+            added[width] += 1
+        for width, how_many_added in added.items():
+            taken = min(how_many_added, capacities[width] - counts[width])
+            counts[width] += taken
+            remaining -= taken
+    return {width: how_many_width for width, how_many_width in counts.items() if how_many_width}
+
+
+def sample_weighted_clauses(
+    rng: Random,
+    weights: Sequence[float],
+    widths: Dict[int, int],
+) -> List[Tuple[int, ...]]:
+    """Return distinct clauses, as sorted codes, drawing every literal code with probability proportional to its weight.
+
+    Repeated literals and clauses are drawn again, drawing up to MAX_WEIGHTED_DRAWS_FACTOR times the literals
+    requested, then an exception is raised (weights too skewed for the requested clauses).
+    """
+    cum_weights = list(accumulate(weights))
+    codes = range(len(weights))
+    max_draws = MAX_WEIGHTED_DRAWS_FACTOR * sum(width * how_many for width, how_many in widths.items())
+    draws = 0
+    clauses: Set[Tuple[int, ...]] = set()
+    for width, how_many in sorted(widths.items()):
+        if width > sum(weight > 0 for weight in weights):
+            raise GenerationFailedException(f'No clause of {width} literals with positive weight.')
+        target = len(clauses) + how_many
+        while len(clauses) < target:
+            clause: Set[int] = set()
+            while len(clause) < width:
+                missing = width - len(clause)
+                if draws + missing > max_draws:
+                    raise GenerationFailedException('Too many repeated draws for the literal weights.')
+                draws += missing
+                clause.update(rng.choices(codes, cum_weights=cum_weights, k=missing))
+            clauses.add(tuple(sorted(clause)))
+    count('sampling.weighted_draws', draws)
+    return list(clauses)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""Streaming readers and writers of cnfs in DIMACS format and in the str format of the library."""
+
+from array import array
+from itertools import islice
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import Union
+
+import numpy as np
+
+from .cnf import CONJUCTION_SYMBOL
+from .cnf import CNF
+from .cnf import DISJUCTION_SYMBOL
+from .cnf import Clause
+from .cnf import Literal
+from .exceptions import MalformedCNFException
+from .packed import PackedCNF
+
+CHUNK_SIZE = 1 << 20
+CLAUSES_PER_WRITE = 4096
+SYMBOL_COMMENT = 'symbol'
+
+
+def _lines(text_file: TextIO, chunk_size: int) -> Iterator[str]:
+    """Iterate through the lines of a file reading it in chunks."""
+    remainder = ''
+    while True:
+        chunk = text_file.read(chunk_size)
+        if not chunk:
+            break
+        lines = (remainder + chunk).split('\n')
+        remainder = lines.pop()
+        yield from lines
+    if remainder:
+        yield remainder
+
+
+class DimacsReader:
+    """Iterate through the clauses of a DIMACS file, as lists of signed symbol indexes, reading it in chunks.
+
+    Header and symbol names (written by DimacsWriter as ``c symbol <index> <name>`` comments) are available
+    as attributes once read, symbols without a name are named by their index.
+    """
+
+    def __init__(self, text_file: TextIO, chunk_size: int = CHUNK_SIZE):
+        """Save the file to read."""
+        self.text_file = text_file
+        self.chunk_size = chunk_size
+        self.num_symbols: Optional[int] = None
+        self.num_clauses: Optional[int] = None
+        self.names: Dict[int, str] = {}
+
+    def symbol(self, idx: int) -> str:
+        """Return the name of the symbol at the 1-based index."""
+        return self.names.get(idx) or str(idx)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        """Iterate through the clauses."""
+        clause: List[int] = []
+        for line in _lines(self.text_file, self.chunk_size):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('c'):
+                self._read_comment(line)
+                continue
+            if line.startswith('p'):
+                self._read_header(line)
+                continue
+            if line.startswith('%'):
+                break
+            try:
+                literals = [int(token) for token in line.split()]
+            except ValueError as error:
+                raise MalformedCNFException(f'Not a DIMACS clause line: {line!r}.') from error
+            for literal in literals:
+                if literal:
+                    clause.append(literal)
+                else:
+                    yield clause
+                    clause = []
+        if clause:
+            yield clause
+
+    def _read_comment(self, line: str):
+        """Save the name of a symbol if the comment contains it."""
+        parts = line.split(maxsplit=3)
+        if len(parts) == 4 and parts[1] == SYMBOL_COMMENT and parts[2].isdigit():
+            self.names[int(parts[2])] = parts[3]
+
+    def _read_header(self, line: str):
+        """Save the number of symbols and of clauses."""
+        parts = line.split()
+        if len(parts) != 4 or parts[1] != 'cnf':
+            raise MalformedCNFException(f'Not a DIMACS cnf header: {line!r}.')
+        self.num_symbols = int(parts[2])
+        self.num_clauses = int(parts[3])
+
+
+class DimacsWriter:
+    """Write clauses, given as signed symbol indexes, to a DIMACS file in buffered chunks."""
+
+    def __init__(
+        self,
+        text_file: TextIO,
+        num_symbols: int,
+        num_clauses: int,
+        symbols: Optional[Sequence[str]] = None,
+        clauses_per_write: int = CLAUSES_PER_WRITE,
+    ):
+        """Write the header, and the names of the symbols as comments if given."""
+        self.text_file = text_file
+        self.clauses_per_write = clauses_per_write
+        self._buffer: List[str] = []
+        if symbols is not None:
+            for start in range(0, len(symbols), clauses_per_write):
+                self.text_file.write(''.join(
+                    f'c {SYMBOL_COMMENT} {idx} {symbol}\n'
+                    for idx, symbol in enumerate(symbols[start:start + clauses_per_write], start=start + 1)
+                ))
+        self.text_file.write(f'p cnf {num_symbols} {num_clauses}\n')
+
+    def write_clause(self, clause: Iterable[int]):
+        """Write a clause."""
+        self._buffer.append(' '.join(map(str, clause)))
+        if len(self._buffer) >= self.clauses_per_write:
+            self.flush()
+
+    def write_clauses(self, clauses: Iterable[Iterable[int]]):
+        """Write many clauses."""
+        for clause in clauses:
+            self.write_clause(clause)
+
+    def flush(self):
+        """Write the buffered clauses."""
+        if self._buffer:
+            self._buffer.append('')
+            self.text_file.write(' 0\n'.join(self._buffer))
+            self._buffer = []
+
+    def __enter__(self) -> 'DimacsWriter':
+        """Return the writer."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Write the buffered clauses."""
+        self.flush()
+
+
+def write_dimacs(cnf: Union[CNF, PackedCNF], text_file: TextIO, with_symbols: bool = True):
+    """Write a cnf in DIMACS format, with the names of the symbols as comments if requested."""
+    if isinstance(cnf, CNF):
+        cnf = PackedCNF.from_cnf(cnf)
+    symbols = cnf.symbols if with_symbols else None
+    with DimacsWriter(text_file, cnf.num_symbols, cnf.num_clauses, symbols) as writer:
+        all_literals = cnf.literals.tolist()
+        offsets = cnf.offsets.tolist()
+        writer.write_clauses(all_literals[start:end] for start, end in zip(offsets[:-1], offsets[1:]))
+
+
+def read_dimacs_packed(text_file: TextIO, chunk_size: int = CHUNK_SIZE) -> PackedCNF:
+    """Read a DIMACS file as a packed cnf, keeping in memory only the packed buffers."""
+    reader = DimacsReader(text_file, chunk_size)
+    literals = array('i')
+    offsets = array('q', [0])
+    max_symbol = 0
+    for clause in reader:
+        literals.extend(clause)
+        offsets.append(len(literals))
+        max_symbol = max(max_symbol, *(abs(literal) for literal in clause), 0)
+    num_symbols = max(reader.num_symbols or 0, max_symbol)
+    symbols = [reader.symbol(idx) for idx in range(1, num_symbols + 1)]
+    return PackedCNF(np.asarray(literals), np.asarray(offsets), symbols)
+
+
+def read_dimacs(text_file: TextIO, chunk_size: int = CHUNK_SIZE) -> CNF:
+    """Read a DIMACS file as a cnf."""
+    reader = DimacsReader(text_file, chunk_size)
+    literals: Dict[int, Literal] = {}
+    clauses = set()
+    for clause in reader:
+        for literal in clause:
+            if literal not in literals:
+                literals[literal] = Literal(reader.symbol(abs(literal)), is_negated=literal < 0)
+        clauses.add(Clause({literals[literal] for literal in clause}))
+    return CNF(clauses)
+
+
+def write_text(cnf: CNF, text_file: TextIO, clauses_per_write: int = CLAUSES_PER_WRITE):
+    """Write a cnf in the str format of the library (the same of ``str(cnf)``) in buffered chunks."""
+    clauses = iter(cnf.clauses)
+    separator = ''
+    while True:
+        chunk = list(islice(clauses, clauses_per_write))
+        if not chunk:
+            break
+        text_file.write(separator + CONJUCTION_SYMBOL.join(str(clause) for clause in chunk))
+        separator = CONJUCTION_SYMBOL
+
+
+def parse_clause(text: str) -> Clause:
+    """Return the clause from its str representation."""
+    return Clause({Literal(token.strip()) for token in text.split(DISJUCTION_SYMBOL) if token.strip()})
+
+
+def iter_text_clauses(text_file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Clause]:
+    """Iterate through the clauses of a file in the str format of the library, reading it in chunks."""
+    remainder = ''
+    started = False
+    while True:
+        chunk = text_file.read(chunk_size)
+        if not chunk:
+            break
+        started = started or bool(chunk.strip())
+        parts = (remainder + chunk).split(CONJUCTION_SYMBOL)
+        remainder = parts.pop()
+        yield from (parse_clause(part) for part in parts)
+    if started:
+        yield parse_clause(remainder)
+
+
+def read_text(text_file: TextIO, chunk_size: int = CHUNK_SIZE) -> CNF:
+    """Read a cnf from a file in the str format of the library."""
+    return CNF(iter_text_clauses(text_file, chunk_size))
+
+
+def parse_cnf(text: str) -> CNF:
+    """Return the cnf from its str representation."""
+    if not text.strip():
+        return CNF(set())
+    return CNF({parse_clause(part) for part in text.split(CONJUCTION_SYMBOL)})
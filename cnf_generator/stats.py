@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""Opt-in statistics about the generation: calls, latencies, loop iterations and failures."""
+
+from collections import Counter
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from functools import wraps
+from time import perf_counter
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import TypeVar
+
+from .exceptions import CNFGenException
+
+FuncType = TypeVar('FuncType', bound=Callable)
+CallHook = Callable[[str, float, bool], None]
+
+# a context variable, so that threads and asyncio tasks started outside of a collecting context do not record
+_collector: ContextVar[Optional['GenerationStats']] = ContextVar('collector', default=None)
+
+
+@dataclass
+class GeneratorStats:
+    """Represent the statistics of the calls to a generator."""
+
+    calls: int = 0
+    failures: int = 0
+    total_time: float = 0
+    latency_histogram: Dict[int, int] = field(default_factory=Counter)
+
+    def record(self, elapsed: float, failed: bool):
+        """Add a call to the statistics, with its latency in seconds in a power of two bucket of microseconds."""
+        self.calls += 1
+        self.failures += int(failed)
+        self.total_time += elapsed
+        self.latency_histogram[int(elapsed * 1e6).bit_length()] += 1
+
+    def merge(self, other: 'GeneratorStats'):
+        """Add the calls of other statistics."""
+        self.calls += other.calls
+        self.failures += other.failures
+        self.total_time += other.total_time
+        for bucket, calls in other.latency_histogram.items():
+            self.latency_histogram[bucket] = self.latency_histogram.get(bucket, 0) + calls
+
+    def as_dict(self) -> Dict:
+        """Return the statistics as a dictionary, with the histogram keyed by the upper bound in microseconds."""
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'total_time': self.total_time,
+            'mean_latency': self.total_time / self.calls if self.calls else 0,
+            'latency_histogram_us': {
+                2 ** bucket: count for bucket, count in sorted(self.latency_histogram.items())
+            },
+        }
+
+
+class GenerationStats:
+    """Collect statistics of generators and counters of the work they do."""
+
+    def __init__(self, hook: Optional[CallHook] = None):
+        """Build empty statistics, with an optional hook called with name, latency and failure of every call."""
+        self.generators: Dict[str, GeneratorStats] = defaultdict(GeneratorStats)
+        self.counters: Dict[str, int] = Counter()
+        self.hook = hook
+
+    def record_call(self, name: str, elapsed: float, failed: bool = False):
+        """Add a call of a generator."""
+        self.generators[name].record(elapsed, failed)
+        if self.hook is not None:
+            self.hook(name, elapsed, failed)
+
+    def count(self, name: str, amount: int = 1):
+        """Increment a counter."""
+        self.counters[name] += amount
+
+    def merge(self, other: 'GenerationStats'):
+        """Add the calls and the counters of other statistics (like the ones of a worker), without calling the hook."""
+        for name, stats in other.generators.items():
+            self.generators[name].merge(stats)
+        for counter, amount in other.counters.items():
+            self.count(counter, amount)
+
+    def as_dict(self) -> Dict:
+        """Return all the statistics as a dictionary."""
+        return {
+            'generators': {name: stats.as_dict() for name, stats in sorted(self.generators.items())},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+
+@contextmanager
+def collecting_stats(stats: Optional[GenerationStats] = None) -> Iterator[GenerationStats]:
+    """Collect the statistics of the generation inside the context, in the given (or new) statistics.
+
+    Threads and tasks started inside the context with a copy of it (like asyncio tasks and the pipelines) record
+    in the same statistics, while the workers of ``random_pairs`` collect their own, merged in these ones.
+    """
+    collector = stats or GenerationStats()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+def current_stats() -> Optional[GenerationStats]:
+    """Return the statistics being collected, None if they are not."""
+    return _collector.get()
+
+
+def count(name: str, amount: int = 1):
+    """Increment a counter if statistics are being collected."""
+    collector = _collector.get()
+    if collector is not None:
+        collector.count(name, amount)
+
+
+def instrumented(func: FuncType) -> FuncType:
+    """Record calls, latency and failures of the function if statistics are being collected."""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):  # noqa: WPS430
+        collector = _collector.get()
+        if collector is None:
+            return func(*args, **kwargs)
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except CNFGenException:
+            collector.record_call(name, perf_counter() - start, failed=True)
+            raise
+        collector.record_call(name, perf_counter() - start)
+        return result
+
+    return wrapper  # type: ignore
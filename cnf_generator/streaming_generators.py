@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+"""Generation of very large random cnfs whose clauses are streamed instead of kept in memory."""
+
+from collections import Counter
+from math import ceil
+from math import comb
+from math import expm1
+from math import log
+from math import sqrt
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import Union
+from typing import cast
+
+import numpy as np
+from numpy.random import SeedSequence
+
+from .array_sampling import DistinctRanks
+from .array_sampling import sample_distinct_codes
+from .array_sampling import sample_symbols_indexes
+from .array_sampling import splitmix64
+from .cnf import STD_SYMBOLS
+from .cnf import Clause
+from .cnf import Literal
+from .exceptions import GenerationFailedException
+from .sampling import combination_unrank
+from .serialization import DimacsWriter
+from .stats import count
+
+CLAUSES_PER_BLOCK = 1 << 16
+MAX_LOAD_FACTOR = 0.5
+DENSE_CLAUSES_FACTOR = 4
+# the widths of the last clauses are drawn one by one, the others in rounds of expected size a few standard
+# deviations below the clauses still to draw, so that a round rarely draws too many
+SEQUENTIAL_WIDTHS = 64
+RACE_MARGIN_SIGMAS = 4
+RACE_TIME_BISECTIONS = 64
+MAX_BINOMIAL_TRIALS = 1 << 62
+
+
+class FingerprintSet:
+    """Set of 64-bit fingerprints in a NumPy open addressing table with linear probing (0 marks empty slots).
+
+    Two items with the same fingerprint are considered equal, which for 64-bit fingerprints of well mixed
+    hashes is very unlikely. The table doubles when it gets full.
+    """
+
+    def __init__(self, capacity: int):
+        """Allocate a table for capacity fingerprints."""
+        self._table = np.zeros(self._table_size(capacity), dtype=np.uint64)
+        self._size = 0
+
+    @classmethod
+    def _table_size(cls, capacity: int) -> int:
+        """Return the smallest power of two large enough for capacity fingerprints."""
+        return 1 << max(4, ceil(capacity / MAX_LOAD_FACTOR - 1).bit_length())
+
+    def __len__(self) -> int:
+        """Return the number of fingerprints in the set."""
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory used by the table."""
+        return self._table.nbytes
+
+    def _insert(self, keys: np.ndarray) -> np.ndarray:
+        """Insert distinct non zero keys, returning which of them were not in the table."""
+        table = self._table
+        mask = np.uint64(table.size - 1)
+        inserted = np.zeros(keys.size, dtype=bool)
+        pending = np.arange(keys.size)
+        slots = keys & mask
+        while pending.size:
+            pending_keys = keys[pending]
+            empty = table[slots] == 0
+            table[slots[empty]] = pending_keys[empty]
+            placed = table[slots] == pending_keys
+            inserted[pending[empty & placed]] = True
+            pending = pending[~placed]
+            slots = (slots[~placed] + np.uint64(1)) & mask
+        return inserted
+
+    def add_many(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Add the fingerprints, returning for every one of them if it is new (its first occurrence)."""
+        fingerprints = np.where(fingerprints == 0, np.uint64(1), fingerprints.astype(np.uint64))
+        keys, first_occurrences = np.unique(fingerprints, return_index=True)
+        if (self._size + keys.size) > MAX_LOAD_FACTOR * self._table.size:
+            old_keys = self._table[self._table != 0]
+            new_size = max(2 * self._table.size, self._table_size(self._size + keys.size))
+            self._table = np.zeros(new_size, dtype=np.uint64)
+            self._insert(old_keys)
+        inserted = self._insert(keys)
+        self._size += int(inserted.sum())
+        is_new = np.zeros(fingerprints.size, dtype=bool)
+        is_new[first_occurrences[inserted]] = True
+        return is_new
+
+
+class BloomFilter:
+    """Probabilistic set of 64-bit fingerprints with a bounded rate of false positives.
+
+    A new fingerprint is reported as already added with probability false_positive_rate (once capacity
+    fingerprints are added), an added one is always reported as such.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        """Allocate the bits for capacity fingerprints with the false positive rate."""
+        num_bits = max(64, ceil(-max(capacity, 1) * log(false_positive_rate) / (log(2) ** 2)))
+        self._words = np.zeros(ceil(num_bits / 64), dtype=np.uint64)
+        self.num_hashes = max(1, round(num_bits / max(capacity, 1) * log(2)))
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of fingerprints added."""
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory used by the bits."""
+        return self._words.nbytes
+
+    def add_many(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Add the fingerprints, returning for every one of them if it is new (its first occurrence)."""
+        keys, first_occurrences = np.unique(fingerprints.astype(np.uint64), return_index=True)
+        # double hashing: the positions of a key are h1 + i * h2 for i in range(num_hashes)
+        steps = splitmix64(keys) | np.uint64(1)
+        positions = keys[:, None] + np.arange(self.num_hashes, dtype=np.uint64) * steps[:, None]
+        positions %= np.uint64(self._words.size * 64)
+        words = (positions >> np.uint64(6)).astype(np.int64)
+        bits = np.left_shift(np.uint64(1), positions & np.uint64(63))
+        inserted = ~((self._words[words] & bits) != 0).all(axis=1)
+        np.bitwise_or.at(self._words, words[inserted].ravel(), bits[inserted].ravel())
+        self._size += int(inserted.sum())
+        is_new = np.zeros(fingerprints.size, dtype=bool)
+        is_new[first_occurrences[inserted]] = True
+        return is_new
+
+
+def _clause_fingerprints(codes: np.ndarray) -> np.ndarray:
+    """Return a 64-bit fingerprint for every row of sorted literal codes."""
+    fingerprints = np.full(codes.shape[0], codes.shape[1], dtype=np.uint64)
+    for column in codes.T:
+        fingerprints = splitmix64(fingerprints ^ column.astype(np.uint64))
+    return fingerprints
+
+
+def _race_time(expected: float, available: Dict[int, int], rates: Dict[int, float]) -> float:
+    """Return the time when the expected number of clauses drawn in the race is the given one."""
+    def drawn_by(time: float) -> float:  # noqa: WPS430
+        return sum(available[width] * -expm1(-time * rates[width]) for width in available)
+
+    low, high = 0.0, 1.0
+    while drawn_by(high) < expected:
+        low, high = high, high * 2
+    for _ in range(RACE_TIME_BISECTIONS):
+        middle = (low + high) / 2
+        if drawn_by(middle) < expected:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def _race_round(
+    rng: np.random.Generator, time: float, available: Dict[int, int], rates: Dict[int, float],
+) -> Dict[int, int]:
+    """Return how many clauses of every width are drawn by the time, each clause being drawn independently."""
+    drawn = {}
+    for width, clauses in available.items():
+        probability = -expm1(-time * rates[width])
+        if clauses > MAX_BINOMIAL_TRIALS:
+            # the binomial of so many trials is a Poisson distribution up to the rounding of the floats
+            drawn[width] = min(int(rng.poisson(clauses * probability)), clauses)
+        else:
+            drawn[width] = int(rng.binomial(clauses, probability))
+    return drawn
+
+
+def _first_drawn(
+    rng: np.random.Generator, how_many: int, time: float, drawn: Dict[int, int], rates: Dict[int, float],
+) -> Dict[int, int]:
+    """Return how many clauses of every width are among the first how_many of the clauses drawn by the time."""
+    widths = np.repeat(list(drawn), list(drawn.values()))
+    width_rates = np.array([rates[width] for width in widths.tolist()])
+    # every clause drawn by the time is drawn at a time with the exponential distribution truncated at the time
+    times = -np.log1p(rng.random(widths.size) * np.expm1(-time * width_rates)) / width_rates
+    first = widths[np.argsort(times, kind='stable')[:how_many]]
+    return {width: int(np.count_nonzero(first == width)) for width in drawn}
+
+
+def _width_counts(
+    rng: np.random.Generator,
+    num_clauses: int,
+    widths: Sequence[int],
+    num_literals: int,
+) -> Dict[int, int]:
+    """Return how many clauses of every width, with the distribution of ``sample_widths``.
+
+    Drawing a width (uniformly) and then a clause of that width, rejecting repeated clauses, every clause of
+    width w is first drawn after an exponential time of rate 1 / comb(num_literals, w), independently of the
+    others. So the clauses drawn by a time are independent binomials, and most clauses are drawn in rounds
+    ending a bit before the last clause (the race going on from where a round ends), the last ones one by one
+    with the weights of ``sample_widths`` (if a round draws too many, the first ones are kept).
+    """
+    capacities = {width: comb(num_literals, width) for width in sorted(set(widths))}
+    capacities = {width: capacity for width, capacity in capacities.items() if capacity > 0}
+    if sum(capacities.values()) < num_clauses:
+        raise GenerationFailedException(f'Not enough distinct clauses of {num_literals} literals.')
+    multiplicities = Counter(widths)
+    rates = {width: multiplicities[width] / capacity for width, capacity in capacities.items()}
+    counts = dict.fromkeys(capacities, 0)
+    remaining = num_clauses
+    while remaining > SEQUENTIAL_WIDTHS:
+        available = {width: capacity - counts[width] for width, capacity in capacities.items()}
+        time = _race_time(remaining - RACE_MARGIN_SIGMAS * sqrt(remaining), available, rates)
+        drawn = _race_round(rng, time, available, rates)
+        if sum(drawn.values()) > remaining:
+            drawn = _first_drawn(rng, remaining, time, drawn, rates)
+        for width, how_many in drawn.items():
+            counts[width] += how_many
+            remaining -= how_many
+    for _ in range(remaining):
+        weights = np.array([rates[width] * (capacity - counts[width]) for width, capacity in capacities.items()])
+        counts[list(capacities)[rng.choice(len(capacities), p=weights / weights.sum())]] += 1
+    return {width: how_many for width, how_many in counts.items() if how_many}
+
+
+class RandomCNFStream:
+    """A random cnf (with the distribution of ``random_cnf``) whose clauses are generated while iterated.
+
+    Only the symbol table and a compact set of fingerprints of the clauses already generated are kept in
+    memory: a ``FingerprintSet`` (8 bytes per slot), or a ``BloomFilter`` if false_positive_rate is given
+    (about 1.2 bytes per clause for 1%). Clauses are distinct with both, a false positive only makes a new
+    clause be drawn again. Widths with so many clauses that their space is almost used up are drawn without
+    fingerprints, with a ``DistinctRanks`` over their space instead. Every iteration generates the same clauses.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        *,
+        symbols: Optional[Sequence[str]] = None,
+        min_num_symbols: int = 25,
+        max_num_symbols: int = 50,
+        min_num_clauses: int = 20,
+        max_num_clauses: int = 30,
+        avg_literals_per_clause: int = 6,
+        all_clauses_same_dimension: bool = True,
+        monotone: bool = False,
+        random_seed: Optional[int] = None,
+        false_positive_rate: Optional[float] = None,
+        block_size: int = CLAUSES_PER_BLOCK,
+        **kwargs,
+    ):
+        """Draw symbols, number of clauses and clauses of every width."""
+        symbols = symbols or sorted(STD_SYMBOLS)
+        self._entropy = cast(int, SeedSequence(random_seed).entropy)  # an int, as random_seed is
+        rng = np.random.default_rng([self._entropy, 0])
+
+        num_symbols = min(int(rng.integers(min_num_symbols, max_num_symbols, endpoint=True)), len(symbols))
+        symbols_indexes = sample_symbols_indexes(rng, np.array([num_symbols]), len(symbols))[0]
+        self.symbols: List[str] = [symbols[idx] for idx in symbols_indexes.tolist()]
+        self.num_clauses = int(rng.integers(min_num_clauses, max_num_clauses, endpoint=True))
+        self.monotone = monotone
+        self.num_literals = num_symbols if monotone else num_symbols * 2
+
+        allowed_widths = [avg_literals_per_clause]
+        if not all_clauses_same_dimension:
+            allowed_widths = list(range(1, min(avg_literals_per_clause * 2, self.num_literals + 1)))
+        self.width_counts = _width_counts(rng, self.num_clauses, allowed_widths, self.num_literals)
+        self.false_positive_rate = false_positive_rate
+        self.block_size = block_size
+
+    def __len__(self) -> int:
+        """Return the number of clauses."""
+        return self.num_clauses
+
+    def _is_dense(self, width: int) -> bool:
+        """Return True if the clauses of the width use a large part of their space."""
+        return comb(self.num_literals, width) <= DENSE_CLAUSES_FACTOR * self.width_counts[width]
+
+    def _signed(self, codes: np.ndarray) -> np.ndarray:
+        """Return the DIMACS-style integers of literal codes."""
+        if self.monotone:
+            return codes + 1
+        return ((codes >> 1) + 1) * (1 - 2 * (codes & 1))
+
+    def __iter__(self) -> Iterator[List[int]]:  # noqa: WPS210
+        """Iterate through the clauses, as lists of signed 1-based symbol indexes."""
+        rng = np.random.default_rng([self._entropy, 1])
+        widths = sorted(self.width_counts)
+        sparse_clauses = sum(self.width_counts[width] for width in widths if not self._is_dense(width))
+        seen: Union[FingerprintSet, BloomFilter]
+        if self.false_positive_rate is None:
+            seen = FingerprintSet(sparse_clauses)
+        else:
+            seen = BloomFilter(sparse_clauses, self.false_positive_rate)
+        dense = {width: DistinctRanks(comb(self.num_literals, width)) for width in widths if self._is_dense(width)}
+
+        remaining = np.array([self.width_counts[width] for width in widths], dtype=np.int64)
+        while remaining.any():
+            quotas = rng.multivariate_hypergeometric(remaining, min(self.block_size, int(remaining.sum())))
+            remaining -= quotas
+            block: List[List[int]] = []
+            for width, quota in zip(widths, quotas.tolist()):
+                if not quota:
+                    continue
+                if width in dense:
+                    codes = np.array(
+                        [
+                            combination_unrank(rank, self.num_literals, width)
+                            for rank in dense[width].take(rng, quota).tolist()
+                        ],
+                        dtype=np.int64,
+                    ).reshape(quota, width)
+                else:
+                    codes = self._draw_new(rng, seen, width, quota)
+                block.extend(self._signed(codes).tolist())
+            yield from (block[idx] for idx in rng.permutation(len(block)).tolist())
+
+    def _draw_new(
+        self,
+        rng: np.random.Generator,
+        seen: Union[FingerprintSet, BloomFilter],
+        width: int,
+        how_many: int,
+    ) -> np.ndarray:
+        """Return how_many clauses of the width never drawn before, as rows of sorted literal codes."""
+        accepted = []
+        while how_many:
+            spaces = np.full(how_many, self.num_literals, dtype=np.int64)
+            codes = sample_distinct_codes(rng, spaces, np.full(how_many, width, dtype=np.int64))
+            is_new = seen.add_many(_clause_fingerprints(codes))
+            count('random_cnf_stream.rejections', how_many - int(is_new.sum()))
+            accepted.append(codes[is_new])
+            how_many -= int(is_new.sum())
+        return np.concatenate(accepted)
+
+    def clauses(self) -> Iterator[Clause]:
+        """Iterate through the clauses as clause objects."""
+        for clause in self:
+            yield Clause({self._literal(literal) for literal in clause})
+
+    def _literal(self, literal: int) -> Literal:
+        """Return the literal object of a signed symbol index."""
+        return Literal(self.symbols[abs(literal) - 1], is_negated=literal < 0)
+
+    def write_dimacs(self, text_file: TextIO, with_symbols: bool = True):
+        """Write the cnf in DIMACS format while generating it, with the names of the symbols as comments if asked."""
+        symbols = self.symbols if with_symbols else None
+        with DimacsWriter(text_file, len(self.symbols), self.num_clauses, symbols) as writer:
+            writer.write_clauses(self)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""Symbol universes, including very large ones generated lazily."""
+
+from random import Random
+from typing import Collection
+from typing import List
+from typing import Sequence
+from typing import Union
+from typing import overload
+
+from .cnf import NEGATED_SYMBOL
+from .cnf import NOT_ALLOWED_SYMBOLS
+from .exceptions import GenerationFailedException
+from .exceptions import SymbolNotAllowed
+
+MAX_UNUSED_SYMBOL_DRAWS = 32
+
+
+class IndexedSymbols(Sequence[str]):
+    """Represent a universe of symbols named by a prefix and their index, generated only when needed.
+
+    It can be used everywhere a list of symbols is accepted, without building millions of strings.
+    """
+
+    def __init__(self, size: int, prefix: str = 'x'):
+        """Save size and prefix of the symbols."""
+        if (not prefix) or prefix.startswith(NEGATED_SYMBOL) or any(char in prefix for char in NOT_ALLOWED_SYMBOLS):
+            raise SymbolNotAllowed(f'Prefix {prefix} not allowed for symbols.')
+        self.size = size
+        self.prefix = prefix
+
+    def __len__(self) -> int:
+        """Return the number of symbols."""
+        return self.size
+
+    @overload
+    def __getitem__(self, idx: int) -> str:
+        """Return the symbol at index."""
+
+    @overload
+    def __getitem__(self, idx: slice) -> List[str]:
+        """Return the symbols in the slice."""
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[str, List[str]]:
+        """Return the symbol at index or the list of symbols in the slice."""
+        if isinstance(idx, slice):
+            return [f'{self.prefix}{position}' for position in range(*idx.indices(self.size))]
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError('Symbol index out of range.')
+        return f'{self.prefix}{idx}'
+
+    def index(self, symbol, start=0, stop=None) -> int:  # noqa: WPS110
+        """Return the index of the symbol."""
+        stop = self.size if stop is None else stop
+        suffix = symbol[len(self.prefix):] if isinstance(symbol, str) and symbol.startswith(self.prefix) else ''
+        if suffix.isdigit() and str(int(suffix)) == suffix and start <= int(suffix) < stop:
+            return int(suffix)
+        raise ValueError(f'{symbol} is not in the symbols.')
+
+    def __contains__(self, symbol) -> bool:
+        """Return True if the symbol is in the universe."""
+        try:
+            self.index(symbol)
+        except ValueError:
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        """Return the representation of the universe."""
+        return f'IndexedSymbols(size={self.size!r}, prefix={self.prefix!r})'
+
+
+def sample_symbols(rng: Random, symbols: Sequence[str], how_many: int) -> List[str]:
+    """Return how_many distinct random symbols (or all of them if fewer), in time proportional to how_many."""
+    how_many = min(how_many, len(symbols))
+    return [symbols[idx] for idx in rng.sample(range(len(symbols)), how_many)]
+
+
+def unused_symbol(rng: Random, symbols: Sequence[str], used: Collection[str]) -> str:
+    """Return a random symbol not in used, raising an exception if there are no one.
+
+    If most of the symbols are not used a few random draws are enough, otherwise the unused ones are listed.
+    """
+    if len(symbols) > 2 * len(used):
+        for _ in range(MAX_UNUSED_SYMBOL_DRAWS):
+            symbol = symbols[rng.randrange(len(symbols))]
+            if symbol not in used:
+                return symbol
+    available = [symbol for symbol in symbols if symbol not in used]
+    if not available:
+        raise GenerationFailedException('All the symbols are already used.')
+    return rng.choice(available)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the cnf classes."""
+
+from dataclasses import fields
+from dataclasses import replace
+from random import Random
+
+from cnf_generator.cnf import CNF
+from cnf_generator.cnf import DeltaCNF
+from cnf_generator.cnf import MIN_CLAUSES_TO_INDEX
+from cnf_generator.cnf import QUERIES_TO_INDEX
+from cnf_generator.cnf import Clause
+from cnf_generator.cnf import Literal
+
+
+def _random_cnf(num_clauses: int) -> CNF:
+    """Return a cnf with the given number of random clauses of 4 literals."""
+    rng = Random(num_clauses)
+    symbols = [f'x{idx}' for idx in range(num_clauses // 4)]
+    return CNF(
+        Clause(Literal(rng.choice(symbols), rng.random() < 0.5) for _ in range(4)) for _ in range(num_clauses)
+    )
+
+
+def _filters(cnf: CNF):
+    """Return the clauses of QUERIES_TO_INDEX filters, half by literals and half by symbols."""
+    return [
+        (
+            set(cnf.filtered_clauses_by_literals({Literal(f'x{idx}')}, {Literal(f'x{idx + 1}', True)})),
+            set(cnf.filtered_clauses_by_symbols({f'x{idx}', f'x{idx + 2}'}, {f'x{idx + 1}'})),
+        )
+        for idx in range(QUERIES_TO_INDEX // 2)
+    ]
+
+
+def test_small_cnfs_are_not_indexed():
+    """Filtering a small cnf scans its clauses, however many times."""
+    cnf = _random_cnf(MIN_CLAUSES_TO_INDEX // 2)
+    _filters(cnf)
+    _filters(cnf)
+    assert cnf._index is None  # noqa: WPS437
+
+
+def test_index_matches_scan():
+    """A large cnf is indexed once filtered often enough, and the index gives the clauses of the scan."""
+    cnf = _random_cnf(MIN_CLAUSES_TO_INDEX * 2)
+    scanned = _filters(cnf)
+    assert cnf._index is None  # noqa: WPS437
+    assert _filters(cnf) == scanned
+    assert cnf._index is not None  # noqa: WPS437
+    assert all(literals and symbols for literals, symbols in scanned)
+
+
+def _check_delta(delta: DeltaCNF, clauses):
+    """Check that the delta cnf behaves as the cnf of the clauses."""
+    cnf = CNF(clauses)
+    assert set(delta.clauses) == set(clauses)
+    assert len(delta.clauses) == len(clauses)
+    assert all(clause in delta.clauses for clause in clauses)
+    assert hash(delta) == hash(cnf)
+    assert delta == cnf
+    assert cnf == delta
+
+
+def test_chained_edits():
+    """A chain of additions and removals gives the cnf of the resulting clauses, sharing the original one."""
+    rng = Random(0)
+    cnf = _random_cnf(MIN_CLAUSES_TO_INDEX)
+    pool = sorted(_random_cnf(MIN_CLAUSES_TO_INDEX // 4).clauses - cnf.clauses, key=str)
+    clauses = set(cnf.clauses)
+    delta = cnf
+    for _ in range(10):
+        removed = set(rng.sample(sorted(clauses, key=str), 3))
+        added = set(rng.sample(pool, 3))
+        delta = DeltaCNF(delta, added=added, removed=removed)
+        clauses = (clauses - removed) | added
+        _check_delta(delta, clauses)
+        assert delta.base is cnf
+
+
+def test_removed_clause_added_again():
+    """A clause removed and then added again is neither added nor removed."""
+    cnf = _random_cnf(8)
+    clause = sorted(cnf.clauses, key=str)[0]
+    without_clause = DeltaCNF(cnf, removed={clause})
+    _check_delta(without_clause, cnf.clauses - {clause})
+    with_clause = DeltaCNF(without_clause, added={clause})
+    _check_delta(with_clause, cnf.clauses)
+    assert not with_clause.added
+    assert not with_clause.removed
+    _check_delta(DeltaCNF(cnf, added={clause}, removed={clause}), cnf.clauses)
+
+
+def test_changes_merged_when_many():
+    """The changes are merged in a new shared cnf once they are more than the shared clauses."""
+    cnf = _random_cnf(8)
+    pool = sorted(_random_cnf(16).clauses - cnf.clauses, key=str)
+    delta = DeltaCNF(cnf, added=pool[:len(cnf.clauses)])
+    assert delta.base is cnf
+    _check_delta(delta, cnf.clauses | set(pool[:len(cnf.clauses)]))
+    merged = DeltaCNF(delta, added=pool[len(cnf.clauses):len(cnf.clauses) + 1])
+    assert merged.base is not cnf
+    assert not merged.added
+    assert not merged.removed
+    _check_delta(merged, cnf.clauses | set(pool[:len(cnf.clauses) + 1]))
+
+
+def test_literal_dataclass_fields():
+    """Literals keep the fields of the dataclass, with the default of is_negated."""
+    assert {field.name: field.default for field in fields(Literal)}['is_negated'] is False
+    literal = Literal('a')
+    assert not literal.is_negated
+    assert replace(literal, is_negated=True) is Literal('a', True)
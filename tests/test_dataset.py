@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the sharded dataset."""
+
+from cnf_generator.dataset import ShardedDataset
+from cnf_generator.dataset import write_shards
+from cnf_generator.random_generators import random_pairs
+
+
+def test_empty_dataset(tmp_path):
+    """A dataset written without pairs has no shards and no pairs."""
+    assert write_shards([], str(tmp_path)) == []
+    dataset = ShardedDataset(str(tmp_path))
+    assert len(dataset) == 0
+    assert list(dataset) == []
+
+
+def test_pairs_across_shards(tmp_path):
+    """Pairs are read back by global index across the shards."""
+    pairs = list(random_pairs(5, random_seed=1))
+    assert len(write_shards(pairs, str(tmp_path), pairs_per_shard=2)) == 3
+    dataset = ShardedDataset(str(tmp_path))
+    assert len(dataset) == 5
+    assert [dataset[idx][2] for idx in range(-5, 5)] == [pair[2] for pair in pairs] * 2
+    assert dataset[4][0] == pairs[4][0]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the export of batches of pairs."""
+
+import numpy as np
+import pytest
+
+from cnf_generator.cnf import CNF
+from cnf_generator.exceptions import CNFGenException
+from cnf_generator.export import PairBatchExporter
+from cnf_generator.packed import PackedCNF
+from cnf_generator.random_generators import random_pairs
+
+
+def _pairs(how_many: int, random_seed: int):
+    """Return random pairs with clauses of different widths."""
+    return list(random_pairs(how_many, all_clauses_same_dimension=False, random_seed=random_seed))
+
+
+def _check_formulas(formula_batch, cnfs):
+    """Check the arrays of a formula batch against the packed cnfs."""
+    for idx, cnf in enumerate(cnfs):
+        packed = PackedCNF.from_cnf(cnf)
+        assert formula_batch.num_clauses[idx] == packed.num_clauses
+        assert formula_batch.num_symbols[idx] == packed.num_symbols
+        widths = packed.clause_lengths
+        assert np.array_equal(formula_batch.clause_widths[idx, :packed.num_clauses], widths)
+        assert not formula_batch.clause_widths[idx, packed.num_clauses:].any()
+        padded = formula_batch.literals[idx]
+        for clause_idx in range(packed.num_clauses):
+            assert np.array_equal(padded[clause_idx, :widths[clause_idx]], packed.clause(clause_idx))
+            assert not padded[clause_idx, widths[clause_idx]:].any()
+        assert not padded[packed.num_clauses:].any()
+
+        first_clause = formula_batch.clause_offsets[idx]
+        indptr = formula_batch.indptr[first_clause:first_clause + packed.num_clauses + 1]
+        assert np.array_equal(indptr - indptr[0], packed.offsets)
+        indices = formula_batch.indices[indptr[0]:indptr[-1]]
+        assert np.array_equal(indices, np.abs(packed.literals) - 1 + formula_batch.symbol_offsets[idx])
+        assert np.array_equal(formula_batch.polarity[indptr[0]:indptr[-1]], np.sign(packed.literals))
+
+
+def test_export_matches_packed_cnfs():
+    """Padded literals, widths and incidence matrices are the ones of the packed cnfs, with the pair types."""
+    pairs = _pairs(20, random_seed=0)
+    batch = PairBatchExporter().export(pairs)
+    _check_formulas(batch.first, [first_cnf for first_cnf, _, _ in pairs])
+    _check_formulas(batch.second, [second_cnf for _, second_cnf, _ in pairs])
+    assert batch.labels.tolist() == [pair_type for _, _, pair_type in pairs]
+
+
+def test_buffers_reused_across_batches():
+    """Batches after the first one are written in the same buffers, and are still correct."""
+    pairs = _pairs(30, random_seed=1)
+    exporter = PairBatchExporter(max_clauses=40, max_width=16)
+    batches = exporter.batches(pairs, batch_size=10)
+    first_batch = next(batches)
+    first_literals = first_batch.first.literals
+    for start, batch in zip((10, 20), batches):
+        assert batch.first.literals.shape == (10, 40, 16)
+        assert np.shares_memory(batch.first.literals, first_literals)
+        assert np.shares_memory(batch.labels, first_batch.labels)
+        _check_formulas(batch.first, [first_cnf for first_cnf, _, _ in pairs[start:start + 10]])
+        _check_formulas(batch.second, [second_cnf for _, second_cnf, _ in pairs[start:start + 10]])
+
+
+def test_fixed_padding_sizes_of_zero():
+    """Padding sizes of 0 are kept, and formulas larger than them are rejected."""
+    empty = CNF(set())
+    batch = PairBatchExporter(max_clauses=0, max_width=0).export([(empty, empty, 0)] * 3)
+    assert batch.first.literals.shape == (3, 0, 0)
+    assert batch.second.clause_widths.shape == (3, 0)
+    with pytest.raises(CNFGenException):
+        PairBatchExporter(max_width=0).export(_pairs(1, random_seed=2))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the exact isomorphism checker."""
+
+from itertools import permutations
+from itertools import product
+from random import Random
+
+from cnf_generator.cnf import CNF
+from cnf_generator.cnf import Clause
+from cnf_generator.cnf import Literal
+from cnf_generator.iso_gen import cnf_isomorphic_generator
+from cnf_generator.isomorphism import IsomorphismChecker
+from cnf_generator.random_generators import random_cnf
+from cnf_generator.random_generators import random_pairs
+
+SMALL_CNF = {
+    'symbols': ['a', 'b', 'c', 'd'],
+    'min_num_symbols': 3,
+    'max_num_symbols': 4,
+    'min_num_clauses': 3,
+    'max_num_clauses': 5,
+    'avg_literals_per_clause': 2,
+    'all_clauses_same_dimension': False,
+}
+
+
+def _symbols(cnf: CNF):
+    """Return the sorted symbols of the cnf."""
+    return sorted({literal.symbol for literal in cnf.literals})
+
+
+def _renamed(cnf: CNF, mapping) -> CNF:
+    """Return the cnf with every symbol replaced by the literal it is mapped to."""
+    return CNF(
+        Clause(
+            Literal(mapping[literal.symbol].symbol, literal.is_negated ^ mapping[literal.symbol].is_negated)
+            for literal in clause.literals
+        )
+        for clause in cnf.clauses
+    )
+
+
+def _brute_force_isomorphic(first_cnf: CNF, second_cnf: CNF) -> bool:
+    """Return True if some renaming and negation of the symbols maps the first cnf to the second."""
+    first_symbols = _symbols(first_cnf)
+    second_symbols = _symbols(second_cnf)
+    if len(first_symbols) != len(second_symbols):
+        return False
+    for targets in permutations(second_symbols):
+        for flips in product((False, True), repeat=len(targets)):
+            mapping = {
+                symbol: Literal(target, flip) for symbol, target, flip in zip(first_symbols, targets, flips)
+            }
+            if _renamed(first_cnf, mapping) == second_cnf:
+                return True
+    return False
+
+
+def test_checker_matches_brute_force():
+    """The checker agrees with a search over all the renamings, and its mappings are isomorphisms."""
+    rng = Random(0)
+    checker = IsomorphismChecker()
+    found = 0
+    for _ in range(300):
+        first_cnf = random_cnf(rng=rng, **SMALL_CNF)
+        if rng.random() < 0.5:
+            second_cnf = cnf_isomorphic_generator(first_cnf, rng=rng, new_symbols=SMALL_CNF['symbols'])
+        else:
+            second_cnf = random_cnf(rng=rng, **SMALL_CNF)
+        mapping = checker.find_isomorphism(first_cnf, second_cnf)
+        assert (mapping is not None) == _brute_force_isomorphic(first_cnf, second_cnf)
+        if mapping is not None:
+            found += 1
+            assert _renamed(first_cnf, mapping) == second_cnf
+    assert 0 < found < 300
+    assert checker.stats.checks == 300
+    assert checker.stats.isomorphic == found
+
+
+def test_audit_pairs():
+    """The pairs of random_pairs are labelled correctly, and a wrong label is reported."""
+    pairs = list(random_pairs(40, random_seed=5))
+    checker = IsomorphismChecker()
+    assert checker.audit_pairs(pairs) == []
+    first_cnf, second_cnf, pair_type = pairs[0]
+    mislabelled = [(first_cnf, second_cnf, 1 if pair_type == 0 else 0)]
+    assert checker.audit_pairs(pairs[1:] + mislabelled) == [len(pairs) - 1]
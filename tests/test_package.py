@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the lazy names of the package."""
+
+import os
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+
+import pytest
+
+import cnf_generator
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SUBMODULES_SCRIPT = '''
+import sys
+import cnf_generator
+assert cnf_generator.cnf.CNF is cnf_generator.CNF
+assert callable(cnf_generator.iso_gen.cnf_isomorphic_generator)
+assert callable(cnf_generator.non_iso_gen.cnf_generator)
+assert 'numpy' not in sys.modules
+'''
+
+
+def test_submodules_as_attributes():
+    """Submodules are imported as attributes of the package, without importing NumPy."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    subprocess.run([sys.executable, '-c', SUBMODULES_SCRIPT], check=True, env=env)  # noqa: S603
+
+
+def test_missing_attribute():
+    """Names that are neither lazy names nor submodules raise AttributeError."""
+    with pytest.raises(AttributeError):
+        cnf_generator.not_a_module  # noqa: B018, WPS428
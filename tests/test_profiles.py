@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the profiles of formulas."""
+
+from cnf_generator.non_iso_gen_paper import cached_swap_analysis
+from cnf_generator.non_iso_gen_paper import swap_analysis
+from cnf_generator.profiles import formula_profile
+from cnf_generator.random_generators import random_cnf
+
+
+def test_profile_does_not_fill_swap_cache():
+    """The swap counts of a profile are the ones of the swap analysis, which is not added to the cache."""
+    cnf = random_cnf(random_seed=5)
+    profile = formula_profile(cnf)
+    assert cached_swap_analysis(cnf) is None
+    candidates = swap_analysis(cnf).candidates
+    assert profile.swap_candidates == len(candidates)
+    assert profile.swappable_pairs == len({(alpha, beta) for alpha, beta, _ in candidates})
+    assert formula_profile(cnf, swaps=False).swap_candidates is None
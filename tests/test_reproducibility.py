@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""Reproducibility of the generated pairs across interpreters with different hash seeds and caches."""
+
+import json
+import os
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+from random import Random
+from typing import Optional
+
+import pytest
+
+from cnf_generator.non_iso_gen_paper import non_trivial_non_isomorphic_cnf_generator
+from cnf_generator.non_iso_gen_paper import swap_analysis
+from cnf_generator.random_generators import random_cnf
+
+ROOT = Path(__file__).resolve().parent.parent
+HASH_SEEDS = ('1', '2', '3')
+
+# the child prints the pairs with clauses and literals sorted, so that only their contents are compared
+CHILD_TEMPLATE = '''
+import json
+from cnf_generator import random_pairs
+from cnf_generator.symbols import IndexedSymbols
+
+def canonical(cnf):
+    return sorted(sorted(str(literal) for literal in clause.literals) for clause in cnf.clauses)
+
+if {start_method!r}:
+    import multiprocessing
+    multiprocessing.set_start_method({start_method!r})
+pairs = random_pairs({arguments})
+print(json.dumps([[canonical(first), canonical(second), pair_type] for first, second, pair_type in pairs]))
+'''
+
+CASES = (
+    'how_many_pairs=6, random_seed=42, start=3',
+    'how_many_pairs=30, random_seed=7, isomorph_probability=1, non_isomoprh_trivial_probability=1, '
+    + 'non_isomoprh_non_trivial_probability=1',
+    'how_many_pairs=20, random_seed=3, symbols=IndexedSymbols(1000), min_num_symbols=5, max_num_symbols=10, '
+    + 'avg_literals_per_clause=3',
+)
+
+
+def _run_child(arguments: str, hash_seed: Optional[str] = None, start_method: str = ''):
+    """Return the pairs generated by a fresh interpreter with the hash seed (random if None)."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.pop('PYTHONHASHSEED', None)
+    if hash_seed is not None:
+        env['PYTHONHASHSEED'] = hash_seed
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', CHILD_TEMPLATE.format(arguments=arguments, start_method=start_method)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize('arguments', CASES)
+def test_pairs_do_not_depend_on_hash_seed(arguments):
+    """The same master seed gives the same pairs whatever the hash seed of the interpreter."""
+    results = [_run_child(arguments, hash_seed) for hash_seed in HASH_SEEDS]
+    assert results[0]
+    assert results[1] == results[0]
+    assert results[2] == results[0]
+
+
+def test_workers_match_serial_with_spawn():
+    """Pairs generated by spawned workers (each with its own hash seed) are the pairs of a serial run."""
+    arguments = 'how_many_pairs=20, random_seed=7, workers={workers}, chunk_size=4'
+    serial = _run_child(arguments.format(workers=1), hash_seed='0')
+    assert _run_child(arguments.format(workers=2), start_method='spawn') == serial
+
+
+def test_swap_does_not_depend_on_the_analysis_cache():
+    """The paper generator gives the same cnf from the same random state, before and after a profile of the cnf."""
+    rng = Random(100)
+    originals = [random_cnf(rng=rng) for _ in range(20)]
+    before = [non_trivial_non_isomorphic_cnf_generator(cnf, rng=Random(100)) for cnf in originals]
+    for cnf in originals:
+        swap_analysis(cnf)
+    after = [non_trivial_non_isomorphic_cnf_generator(cnf, rng=Random(100)) for cnf in originals]
+    assert after == before
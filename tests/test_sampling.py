@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the sampling of clauses."""
+
+from collections import Counter
+from random import Random
+
+import pytest
+
+from cnf_generator.batch_generators import random_packed_cnfs
+from cnf_generator.exceptions import GenerationFailedException
+from cnf_generator.random_generators import random_cnf
+from cnf_generator.sampling import MAX_WEIGHTED_DRAWS_FACTOR
+from cnf_generator.sampling import sample_weighted_clauses
+from cnf_generator.sampling import sample_widths
+from cnf_generator.stats import collecting_stats
+from cnf_generator.streaming_generators import RandomCNFStream
+
+DRAWS = 6000
+TOLERANCE = 0.03
+
+# two clauses over the literals of one symbol, of width 1 ({a} and {!a}) or 2 ({a, !a}): after a first clause
+# of width 1 (probability 1/2) a second one is rejected half of the times with width 1 and never with width 2,
+# so both clauses have width 1 with probability 1/2 * 1/3
+BOTH_NARROW_PROBABILITY = 1 / 6
+ONE_SYMBOL_CNF = {
+    'symbols': ['a'],
+    'min_num_symbols': 1,
+    'max_num_symbols': 1,
+    'min_num_clauses': 2,
+    'max_num_clauses': 2,
+    'avg_literals_per_clause': 2,
+    'all_clauses_same_dimension': False,
+}
+# 150 clauses of widths from 1 to 7 over the 8 literals of 4 symbols, most drawn in rounds by the stream
+MANY_CLAUSES_CNF = {
+    'symbols': ['a', 'b', 'c', 'd'],
+    'min_num_symbols': 4,
+    'max_num_symbols': 4,
+    'min_num_clauses': 150,
+    'max_num_clauses': 150,
+    'avg_literals_per_clause': 4,
+    'all_clauses_same_dimension': False,
+}
+MEAN_TOLERANCE = 0.3
+
+
+def test_sample_widths_as_rejection_sampling():
+    """Widths are drawn as often as drawing clauses and rejecting the repeated ones."""
+    rng = Random(0)
+    both_narrow = sum(sample_widths(rng, 2, [1, 2], 2) == {1: 2} for _ in range(DRAWS))
+    assert abs(both_narrow / DRAWS - BOTH_NARROW_PROBABILITY) < TOLERANCE
+
+
+def test_random_cnf_widths_match_batch():
+    """random_cnf and random_packed_cnfs draw the widths of the clauses with the same distribution."""
+    rng = Random(0)
+    both_narrow = sum(
+        all(len(clause.literals) == 1 for clause in random_cnf(rng=rng, **ONE_SYMBOL_CNF).clauses)
+        for _ in range(DRAWS)
+    )
+    assert abs(both_narrow / DRAWS - BOTH_NARROW_PROBABILITY) < TOLERANCE
+    packed = random_packed_cnfs(DRAWS, random_seed=0, **ONE_SYMBOL_CNF)
+    both_narrow = sum(formula.clause_lengths.max() == 1 for formula in packed)
+    assert abs(both_narrow / DRAWS - BOTH_NARROW_PROBABILITY) < TOLERANCE
+
+
+def test_stream_widths_match_random_cnf():
+    """The widths of a stream have the distribution of the widths of random_cnf."""
+    streams = [RandomCNFStream(random_seed=seed, **ONE_SYMBOL_CNF) for seed in range(DRAWS)]
+    both_narrow = sum(stream.width_counts == {1: 2} for stream in streams)
+    assert abs(both_narrow / DRAWS - BOTH_NARROW_PROBABILITY) < TOLERANCE
+
+    draws = DRAWS // 4
+    stream_counts: Counter = Counter()
+    for seed in range(draws):
+        stream_counts.update(RandomCNFStream(random_seed=seed, **MANY_CLAUSES_CNF).width_counts)
+    rng = Random(0)
+    sampled_counts: Counter = Counter()
+    for _ in range(draws):
+        sampled_counts.update(sample_widths(rng, 150, range(1, 8), 8))
+    for width in range(1, 8):
+        assert abs(stream_counts[width] - sampled_counts[width]) / draws < MEAN_TOLERANCE
+
+
+def test_weighted_draws_bounded_by_literals():
+    """Weighted sampling draws at most MAX_WEIGHTED_DRAWS_FACTOR times the literals requested."""
+    widths = {2: 10, 3: 10}
+    requested = sum(width * how_many for width, how_many in widths.items())
+    with collecting_stats() as stats:
+        clauses = sample_weighted_clauses(Random(0), [4, 1, 1, 1, 1, 1, 1, 1], widths)
+    assert sorted(map(len, clauses)) == [2] * 10 + [3] * 10
+    assert len(set(clauses)) == len(clauses)
+    assert requested <= stats.counters['sampling.weighted_draws'] <= MAX_WEIGHTED_DRAWS_FACTOR * requested
+    with pytest.raises(GenerationFailedException):
+        sample_weighted_clauses(Random(0), [1, 1e-300], {1: 2})
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the readers and writers of cnfs."""
+
+from io import StringIO
+
+import numpy as np
+import pytest
+
+from cnf_generator.exceptions import MalformedCNFException
+from cnf_generator.packed import PackedCNF
+from cnf_generator.random_generators import random_cnf
+from cnf_generator.serialization import DimacsReader
+from cnf_generator.serialization import parse_cnf
+from cnf_generator.serialization import read_dimacs
+from cnf_generator.serialization import read_dimacs_packed
+from cnf_generator.serialization import read_text
+from cnf_generator.serialization import write_dimacs
+from cnf_generator.serialization import write_text
+
+SMALL_CHUNK_SIZES = (1, 2, 3, 7)
+
+
+def _cnf(random_seed: int):
+    """Return a random cnf with clauses of different widths."""
+    return random_cnf(
+        min_num_symbols=5,
+        max_num_symbols=10,
+        min_num_clauses=10,
+        max_num_clauses=20,
+        avg_literals_per_clause=3,
+        all_clauses_same_dimension=False,
+        random_seed=random_seed,
+    )
+
+
+def _dimacs(cnf) -> StringIO:
+    """Return a file with the cnf written in DIMACS format, ready to be read."""
+    text_file = StringIO()
+    write_dimacs(cnf, text_file)
+    text_file.seek(0)
+    return text_file
+
+
+@pytest.mark.parametrize('chunk_size', SMALL_CHUNK_SIZES)
+def test_dimacs_round_trip(chunk_size):
+    """A cnf written in DIMACS format is read back equal, whatever the size of the chunks read."""
+    for random_seed in range(10):
+        cnf = _cnf(random_seed)
+        assert read_dimacs(_dimacs(cnf), chunk_size) == cnf
+
+
+@pytest.mark.parametrize('chunk_size', SMALL_CHUNK_SIZES)
+def test_dimacs_packed_round_trip(chunk_size):
+    """A cnf written in DIMACS format is read back as the packed cnf of the cnf."""
+    for random_seed in range(10):
+        cnf = _cnf(random_seed)
+        expected = PackedCNF.from_cnf(cnf)
+        packed = read_dimacs_packed(_dimacs(cnf), chunk_size)
+        assert packed.symbols == expected.symbols
+        assert np.array_equal(packed.literals, expected.literals)
+        assert np.array_equal(packed.offsets, expected.offsets)
+        assert packed.to_cnf() == cnf
+
+
+@pytest.mark.parametrize('chunk_size', SMALL_CHUNK_SIZES)
+def test_text_round_trip(chunk_size):
+    """A cnf written in the str format is read back equal, with chunks split inside the clauses."""
+    for random_seed in range(10):
+        cnf = _cnf(random_seed)
+        text_file = StringIO()
+        write_text(cnf, text_file, clauses_per_write=chunk_size)
+        assert text_file.getvalue() == str(cnf)
+        text_file.seek(0)
+        assert read_text(text_file, chunk_size) == cnf
+        assert parse_cnf(str(cnf)) == cnf
+
+
+def test_empty_text():
+    """An empty text is the cnf without clauses."""
+    assert parse_cnf('') == parse_cnf(' ')
+    assert not parse_cnf('').clauses
+    assert read_text(StringIO('')) == parse_cnf('')
+
+
+@pytest.mark.parametrize('text', ['!', 'a|!', 'a|b&c|!'])
+def test_malformed_text(text):
+    """A literal without a symbol is rejected."""
+    with pytest.raises(MalformedCNFException):
+        parse_cnf(text)
+
+
+@pytest.mark.parametrize('text', ['p cnf 3\n1 2 0\n', 'p dnf 3 1\n1 2 0\n', 'p cnf 3 1\n1 a 0\n'])
+def test_malformed_dimacs(text):
+    """Malformed headers and clause lines are rejected."""
+    with pytest.raises(MalformedCNFException):
+        list(DimacsReader(StringIO(text)))
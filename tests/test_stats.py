@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the statistics of the generation."""
+
+import pytest
+
+from cnf_generator.pipeline import prefetched_pairs
+from cnf_generator.random_generators import random_pairs
+from cnf_generator.stats import collecting_stats
+
+NUM_PAIRS = 12
+
+
+def _calls_and_counters(stats):
+    """Return the number of calls of every generator and the counters, which do not depend on timing."""
+    stats_dict = stats.as_dict()
+    calls = {name: generator['calls'] for name, generator in stats_dict['generators'].items()}
+    return calls, stats_dict['counters']
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_workers_stats_match_serial(workers):
+    """The statistics collected by the workers are merged in the ones of the caller."""
+    with collecting_stats() as serial_stats:
+        serial_pairs = list(random_pairs(NUM_PAIRS, random_seed=3))
+    with collecting_stats() as stats:
+        pairs = list(random_pairs(NUM_PAIRS, random_seed=3, workers=workers, chunk_size=4))
+    assert pairs == serial_pairs
+    calls, counters = _calls_and_counters(stats)
+    assert calls['random_cnf'] == NUM_PAIRS
+    assert sum(counters.values()) >= NUM_PAIRS
+    assert (calls, counters) == _calls_and_counters(serial_stats)
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_pipeline_stats(workers):
+    """The pairs produced by a pipeline started inside the context are recorded."""
+    with collecting_stats() as serial_stats:
+        list(random_pairs(NUM_PAIRS, random_seed=3))
+    with collecting_stats() as stats:
+        with prefetched_pairs(NUM_PAIRS, random_seed=3, workers=workers, chunk_size=4) as pipeline:
+            assert len(list(pipeline)) == NUM_PAIRS
+    assert _calls_and_counters(stats) == _calls_and_counters(serial_stats)
+
+
+def test_no_stats_outside_of_the_context():
+    """Nothing is recorded once the context is left."""
+    with collecting_stats() as stats:
+        pass  # noqa: WPS420
+    list(random_pairs(2, random_seed=3))
+    assert stats.as_dict() == {'generators': {}, 'counters': {}}
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+"""Tests of the generation of streamed cnfs."""
+
+import numpy as np
+
+from cnf_generator.array_sampling import DistinctRanks
+from cnf_generator.streaming_generators import RandomCNFStream
+
+
+def test_distinct_ranks_take_all():
+    """All the ranks are taken once, across the rejection and the shuffled phases."""
+    ranks = DistinctRanks(1000)
+    rng = np.random.default_rng(0)
+    taken = np.concatenate([ranks.take(rng, how_many) for how_many in (300, 300, 1, 399)])
+    assert sorted(taken.tolist()) == list(range(1000))
+    assert ranks.available == 0
+
+
+def test_dense_stream():
+    """A stream with all the clauses of a width has them all, once, and the same at every iteration."""
+    stream = RandomCNFStream(
+        symbols=['a', 'b', 'c'],
+        min_num_symbols=3,
+        max_num_symbols=3,
+        min_num_clauses=15,
+        max_num_clauses=15,
+        avg_literals_per_clause=2,
+        block_size=4,
+        random_seed=1,
+    )
+    clauses = [tuple(sorted(clause)) for clause in stream]
+    assert len(set(clauses)) == 15
+    assert [tuple(sorted(clause)) for clause in stream] == clauses